@@ -5,6 +5,14 @@ from contextlib import asynccontextmanager
 from app.db.database import init_db, engine
 from app.auth.routes import auth_router
 from app.data.routes import router as data_router
+from app.metrics.routes import metrics_router
+from app.data.embeddings import embedding_registry, embedding_executor
+from app.data.jobs import fail_stale_jobs, ingestion_queue
+from app.data.utils import shutdown_pdf_pool
+from app.db.redis import revocation_cache
+from app.db.storage import storage
+from app.companies.metering import ticket_meter
+import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -12,10 +20,26 @@ async def lifespan(app: FastAPI):
     print('Server started...')
     from app.companies.models import Company
     await init_db()
+    # Sources a crashed worker left "processing" would otherwise never finish
+    await fail_stale_jobs()
+    # Load the default embedding model once so uploads don't pay for it
+    await asyncio.to_thread(embedding_registry.get)
+    await embedding_executor.start()
+    await ingestion_queue.start()
+    await revocation_cache.start()
+    await ticket_meter.start()
     yield
     # Shutdown code here
+    # Jobs still running need storage, the embedding executor and the database
+    await ingestion_queue.stop()
+    await ticket_meter.stop()
+    await revocation_cache.stop()
+    await storage.close()
+    shutdown_pdf_pool()
+    await embedding_executor.stop()
+    embedding_registry.clear()
     print('Server has been stopped...')
-    # await engine.dispose()  # ✅ Clean up async connections
+    await engine.dispose()  # ✅ Clean up async connections
 
 
 version="v1"
@@ -24,10 +48,11 @@ app = FastAPI(
     title="Kaleem Backend",
     description="Backend API for Kaleem Application",
     version=version,
-    # lifespan=lifespan
+    lifespan=lifespan
 )
 
 
 app.include_router(company_router, prefix=f"/api/{version}/companies", tags=["companies"])
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
-app.include_router(data_router, prefix=f"/api/{version}/data", tags=["data"])
\ No newline at end of file
+app.include_router(data_router, prefix=f"/api/{version}/data", tags=["data"])
+app.include_router(metrics_router, prefix=f"/api/{version}/metrics", tags=["metrics"])
\ No newline at end of file
@@ -0,0 +1,98 @@
+# app/auth/cache.py
+from typing import Optional
+import json
+import logging
+
+from app.auth.models import User
+from app.core.cache import LRUCache
+from app.core.config import Config
+from app.db.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Credentials never leave the database
+_EXCLUDED_COLUMNS = {"password_hash"}
+_COLUMNS = [column for column in User.__table__.columns if column.key not in _EXCLUDED_COLUMNS]
+
+
+def _snapshot(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in _COLUMNS}
+
+
+def _decode(raw: bytes) -> dict:
+    data = json.loads(raw)
+    for column in _COLUMNS:
+        value = data.get(column.key)
+        python_type = column.type.python_type
+        if value is not None and not isinstance(value, python_type):
+            data[column.key] = (
+                python_type.fromisoformat(value) if hasattr(python_type, "fromisoformat")
+                else python_type(value)
+            )
+    return data
+
+
+class UserCache:
+    """
+    Short-lived cache of users by uid for the auth path.
+
+    Entries are column snapshots (without the password hash), so every hit
+    builds a fresh detached User that no session or other request shares.
+    The optional Redis tier lets workers share entries; both tiers are
+    dropped by `invalidate`.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30, use_redis: bool = False):
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._local = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _redis_key(user_uid: str) -> str:
+        return f"user:{user_uid}"
+
+    async def get(self, user_uid: str) -> Optional[User]:
+        user_uid = str(user_uid)
+        data = self._local.get(user_uid)
+
+        if data is None and self.use_redis:
+            try:
+                raw = await redis_client.get(self._redis_key(user_uid))
+            except Exception as e:
+                logger.warning(f"User cache Redis read failed: {e}")
+                raw = None
+            if raw is not None:
+                data = _decode(raw)
+                self._local.set(user_uid, data)
+
+        return User(**data) if data is not None else None
+
+    async def set(self, user: User) -> None:
+        user_uid = str(user.uid)
+        data = _snapshot(user)
+        self._local.set(user_uid, data)
+
+        if self.use_redis:
+            try:
+                await redis_client.set(
+                    self._redis_key(user_uid), json.dumps(data, default=str), ex=int(self.ttl)
+                )
+            except Exception as e:
+                logger.warning(f"User cache Redis write failed: {e}")
+
+    async def invalidate(self, user_uid: str) -> None:
+        user_uid = str(user_uid)
+        self._local.pop(user_uid)
+
+        if self.use_redis:
+            try:
+                await redis_client.delete(self._redis_key(user_uid))
+            except Exception as e:
+                logger.warning(f"User cache Redis delete failed: {e}")
+
+
+user_cache = UserCache(
+    maxsize=Config.USER_CACHE_SIZE,
+    ttl=Config.USER_CACHE_TTL,
+    use_redis=Config.USER_CACHE_REDIS,
+)
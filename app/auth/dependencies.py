@@ -2,13 +2,14 @@ from fastapi.security import HTTPBearer
 from fastapi import Request, status, Depends
 from fastapi.security.http import HTTPAuthorizationCredentials
 from fastapi.exceptions import HTTPException
-from app.auth.utils import decode_token
+from app.auth.utils import decode_token_cached
 from app.db.redis import token_in_blocklist
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Any
 from app.db.database import get_db
 from app.auth.service import UserService
 from app.auth.models import User
+from app.auth.cache import user_cache
 
 
 user_service = UserService()
@@ -23,9 +24,16 @@ class TokenBearer(HTTPBearer):
 
         token = creds.credentials
 
-        token_data = decode_token(token)
+        # Another bearer already verified this token during the request
+        verified = getattr(request.state, "verified_token", None)
+        if verified is not None and verified[0] == token:
+            token_data = verified[1]
+            self.verify_token_data(token_data)
+            return token_data
 
-        if not self.token_valid(token):
+        token_data = decode_token_cached(token)
+
+        if token_data is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail={
@@ -47,19 +55,11 @@ class TokenBearer(HTTPBearer):
         
         self.verify_token_data(token_data)
 
-        # print(creds.scheme)
-
-        # print(creds.credentials)
+        request.state.verified_token = (token, token_data)
 
         return token_data
     
 
-    def token_valid(self, token: str) -> bool:
-
-        token_data = decode_token(token)
-
-        return token_data is not None
-    
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please Override this method in child classes")
     
@@ -83,11 +83,27 @@ class RefreshTokenBearer(TokenBearer):
             
             
 
-async def get_current_user(token_details: dict = Depends(AccessTokenBearer()),
+async def get_current_user(request: Request,
+                     token_details: dict = Depends(AccessTokenBearer()),
                      session: AsyncSession = Depends(get_db)):
-    user_email = token_details['user']['email']
-
-    user = await user_service.get_user_by_email(user_email, session)
+    # One lookup per request, however many dependencies ask for the user
+    user = getattr(request.state, "current_user", None)
+    if user is not None:
+        return user
+
+    user_uid = token_details['user'].get('user_uid')
+
+    if user_uid is not None:
+        user = await user_cache.get(user_uid)
+        if user is None:
+            user = await user_service.get_user_by_uid(user_uid, session)
+            if user is not None:
+                await user_cache.set(user)
+    else:
+        # Tokens issued before user_uid was added to the claims
+        user = await user_service.get_user_by_email(token_details['user']['email'], session)
+
+    request.state.current_user = user
 
     return user
 
@@ -4,7 +4,10 @@ import uuid
 from datetime import datetime
 import sqlalchemy.dialects.postgresql as pg
 from app.companies import models
-from typing import List
+from typing import List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.data.models import TrainingDataSource
 
 
 class User(SQLModel, table=True):
@@ -32,7 +35,10 @@ class User(SQLModel, table=True):
     is_active: bool = Field(default=False)
     is_superuser: bool = Field(default=False)
     password_hash: str = Field(exclude=True)  # Do not include in the response model
-    company: List["models.Company"] = Relationship(back_populates="user", sa_relationship_kwargs={'lazy': 'selectin'})
+    # Relationships never load implicitly; queries that need them opt in with
+    # selectinload (see UserService.get_user_with_relations)
+    company: List["models.Company"] = Relationship(back_populates="user", sa_relationship_kwargs={'lazy': 'raise'})
+    data: List["TrainingDataSource"] = Relationship(back_populates="user", sa_relationship_kwargs={'lazy': 'raise'})
     created_at: datetime = Field(default_factory=datetime.utcnow)  # Use default_factory to generate current time
     updated_at: datetime = Field(default_factory=datetime.utcnow)  # Use default_factory to generate current time
 
@@ -5,12 +5,13 @@ from app.auth.service import UserService
 from app.db.database import get_db
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.exceptions import HTTPException
-from app.auth.utils import create_access_token, decode_token, verify_password
+from app.auth.utils import create_access_token, decode_token, password_hasher
 from datetime import timedelta
 from fastapi.responses import JSONResponse
 from app.auth.dependencies import RefreshTokenBearer, AccessTokenBearer, get_current_user, RoleChecker
 from datetime import datetime
 from app.db.redis import add_jti_to_blocklist
+import logging
 
 
 auth_router = APIRouter()
@@ -35,8 +36,6 @@ REFRESH_TOKEN_EXPIRY = 2
 
 @auth_router.post('/signup', response_model=UserResponseModel, status_code=status.HTTP_201_CREATED)
 async def create_user_account(user_data: UserCreateModel, session: AsyncSession = Depends(get_db)):
-    print("📥 Received signup request")
-
     email = user_data.email
     user_exists = await user_service.user_exists(email, session)
     if user_exists:
@@ -44,7 +43,6 @@ async def create_user_account(user_data: UserCreateModel, session: AsyncSession
 
     new_user = await user_service.create_user(user_data, session)
     response_data = UserResponseModel.from_orm(new_user)
-    print("✅ Returning user:", response_data)
     return response_data
 
 
@@ -56,17 +54,19 @@ async def login_users(login_data: UserLoginModel, session: AsyncSession = Depend
 
         user = await user_service.get_user_by_email(email, session)
         if not user:
-            print("❌ User not found:", email)
+            logging.debug(f"Login failed, user not found: {email}")
             raise HTTPException(status_code=403, detail="Invalid Email Or Password")
 
-        print("🔐 Verifying password for:", email)
-        print("Stored hash:", user.password_hash)
-
-        password_valid = verify_password(password, user.password_hash)
+        password_valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
         if not password_valid:
-            print("❌ Invalid password")
+            logging.debug(f"Login failed, invalid password: {email}")
             raise HTTPException(status_code=403, detail="Invalid Email Or Password")
 
+        if new_hash is not None:
+            # Stored hash used outdated cost parameters; upgrade it transparently
+            user.password_hash = new_hash
+            await session.commit()
+
         access_token = create_access_token(
             user_data={'email': user.email, 'user_uid': str(user.uid), "role": user.role}
         )
@@ -77,7 +77,7 @@ async def login_users(login_data: UserLoginModel, session: AsyncSession = Depend
             expiry=timedelta(days=REFRESH_TOKEN_EXPIRY)
         )
 
-        print("✅ Login successful for:", email)
+        logging.debug(f"Login successful: {email}")
         return JSONResponse(content={
             "message": "Login successful",
             "access_token": access_token,
@@ -89,7 +89,7 @@ async def login_users(login_data: UserLoginModel, session: AsyncSession = Depend
         })
 
     except Exception as e:
-        print("🔥 Exception during login:", repr(e))
+        logging.error(f"Exception during login: {e!r}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 
@@ -98,8 +98,6 @@ async def login_users(login_data: UserLoginModel, session: AsyncSession = Depend
 async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer())):
     expiry_timestamp = token_details['exp']
 
-    print(expiry_timestamp)
-
     if datetime.fromtimestamp(expiry_timestamp) > datetime.now():
         new_access_token = create_access_token(
             user_data=token_details['user']
@@ -117,8 +115,11 @@ async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer(
 
 
 @auth_router.get('/me', response_model=UserCompanyModel)
-async def get_current_user(user = Depends(get_current_user), _:bool=Depends(role_checker)):
-    return user
+async def get_current_user(user = Depends(get_current_user),
+                           session: AsyncSession = Depends(get_db),
+                           _:bool=Depends(role_checker)):
+    # The auth path only loads the user's columns; this is the one endpoint that renders its relations
+    return await user_service.get_user_with_relations(user.uid, session)
 
 
 @auth_router.get('/logout')
@@ -32,7 +32,7 @@ class UserModel(BaseModel):
     updated_at: datetime 
 
 class UserCompanyModel(UserModel):
-    companies: List[Company] = []
+    companies: List[Company] = Field(default=[], validation_alias="company")
     data: List[TrainingDataSourceRead] = []
 
 class UserResponseModel(BaseModel):
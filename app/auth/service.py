@@ -1,10 +1,28 @@
 from app.auth.models import User
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy.orm import selectinload
 from app.auth.schemas import UserCreateModel
-from app.auth.utils import generate_pass_hash
+from app.auth.utils import password_hasher
 
 class UserService:
+    async def get_user_by_uid(self, user_uid: str, session: AsyncSession):
+        statement = select(User).where(User.uid == user_uid)
+
+        result = await session.exec(statement)
+
+        return result.first()
+
+    async def get_user_with_relations(self, user_uid: str, session: AsyncSession):
+        """The user with its companies and training data loaded, for /auth/me."""
+        statement = select(User).where(User.uid == user_uid).options(
+            selectinload(User.company), selectinload(User.data)
+        )
+
+        result = await session.exec(statement)
+
+        return result.first()
+
     async def get_user_by_email(self, email: str, session: AsyncSession):
         statement = select(User).where(User.email == email)
 
@@ -24,7 +42,7 @@ class UserService:
 
         new_user = User(**user_data_dict)
 
-        new_user.password_hash = generate_pass_hash(user_data_dict["password"])
+        new_user.password_hash = await password_hasher.hash(user_data_dict["password"])
 
         new_user.role = 'user'
 
@@ -33,6 +51,3 @@ class UserService:
         await session.commit()
 
         return new_user
-
-        
-
@@ -1,16 +1,30 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from app.core.config import Config
+from app.core.cache import LRUCache
+from app.core.metrics import register_metrics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import hashlib
+import time
 import uuid
 import jwt
 import logging
 
 password_context = CryptContext(
-    schemes=['bcrypt']
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__rounds=Config.BCRYPT_ROUNDS,
+    # Hashes below the configured cost are flagged by verify_and_update
+    bcrypt__min_rounds=Config.BCRYPT_ROUNDS
 )
 
 ACCESS_TOKEN_EXPIRY = 3600
 
+# Recently verified tokens, keyed by the token's SHA-256; entries expire with the token
+verified_tokens = LRUCache(maxsize=Config.TOKEN_CACHE_SIZE)
+
 def generate_pass_hash(password: str) -> str:
     hash = password_context.hash(password)
 
@@ -19,6 +33,51 @@ def generate_pass_hash(password: str) -> str:
 def verify_password(password: str, hash: str) -> bool:
     return password_context.verify(password, hash)
 
+
+class PasswordHasher:
+    """
+    Async front for bcrypt. Hashing runs on a fixed-size thread pool (bcrypt
+    releases the GIL), so at most `workers` hashes run at once and a login
+    storm queues up here instead of stalling the event loop.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._in_flight = 0
+        self._max_in_flight = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(password_context.hash, password)
+
+    async def verify(self, password: str, hash: str) -> bool:
+        return await self._run(password_context.verify, password, hash)
+
+    async def verify_and_update(self, password: str, hash: str) -> tuple[bool, Optional[str]]:
+        """Returns (valid, new_hash); new_hash is set when the stored hash uses outdated parameters."""
+        return await self._run(password_context.verify_and_update, password, hash)
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.workers),
+            "max_in_flight": self._max_in_flight,
+        }
+
+    async def _run(self, fn, *args):
+        self._in_flight += 1
+        self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self._in_flight -= 1
+
+
+password_hasher = PasswordHasher(workers=Config.PASSWORD_HASH_WORKERS)
+
+register_metrics("password_hasher", password_hasher.metrics)
+
 def create_access_token(user_data: dict, expiry: timedelta = None, refresh: bool = False):
 
     payload = {}
@@ -54,3 +113,25 @@ def decode_token(token: str) -> dict:
     except jwt.PyJWKError as e:
         logging.exception(e)
         return None
+
+
+def decode_token_cached(token: str) -> Optional[dict]:
+    """
+    decode_token with a bounded cache of already verified tokens, so the
+    signature check and JSON parsing happen once per token rather than once
+    per request. The returned claims are shared: treat them as read-only.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+
+    token_data = verified_tokens.get(key)
+    if token_data is not None:
+        return token_data
+
+    token_data = decode_token(token)
+
+    if token_data is not None:
+        ttl = token_data.get('exp', 0) - time.time()
+        if ttl > 0:
+            verified_tokens.set(key, token_data, ttl=ttl)
+
+    return token_data
@@ -0,0 +1,35 @@
+# app/companies/dependencies.py
+from fastapi import Depends, HTTPException, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
+
+from app.companies.metering import ticket_meter
+from app.db.database import get_db
+from app.errors.exceptions import CompanyNotFound
+
+
+class TicketQuota:
+    """
+    Dependency for endpoints that use up tickets (e.g. bot answers): takes
+    `tickets` from the company in the `company_uid` path parameter, or
+    answers 429 once its monthly limit is reached.
+    """
+
+    def __init__(self, tickets: int = 1) -> None:
+        self.tickets = tickets
+
+    async def __call__(self, company_uid: str, session: AsyncSession = Depends(get_db)) -> None:
+        try:
+            usage = await ticket_meter.consume(company_uid, session, self.tickets)
+        except CompanyNotFound:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
+        except Exception as e:
+            # Metering must not take the endpoint down with it
+            logging.warning(f"Ticket metering failed for company {company_uid}: {e}")
+            return
+
+        if usage is None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Monthly ticket limit reached"
+            )
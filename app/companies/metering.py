@@ -0,0 +1,280 @@
+# app/companies/metering.py
+from typing import Optional
+import asyncio
+import logging
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.companies.models import Company
+from app.core.config import Config
+from app.core.metrics import register_metrics
+from app.db.database import async_session
+from app.db.redis import redis_client
+from app.errors.exceptions import CompanyNotFound
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tickets"
+# Keys under the prefix:
+#   usage:<company_uid>     the company's usage, including tickets not flushed yet
+#   limit:<company_uid>     cached monthly_ticket_limit
+#   (both expire after counter_ttl, so changes made in Postgres are picked up)
+#   pending                 hash: company_uid -> tickets not yet written to Postgres
+#   pending:flushing:<ts>:<id>  pending counts a flush has taken but not finished
+#   flushing                set of those flushing keys, so nothing has to SCAN for them
+
+NOT_LOADED = -2
+OVER_LIMIT = -1
+
+# KEYS: usage, limit, pending; ARGV: company_uid, tickets.
+# Check and increment in one step so concurrent requests can't overshoot the limit.
+CONSUME_SCRIPT = """
+local usage = redis.call('GET', KEYS[1])
+local limit = redis.call('GET', KEYS[2])
+if not usage or not limit then
+    return -2
+end
+local tickets = tonumber(ARGV[2])
+if tonumber(usage) + tickets > tonumber(limit) then
+    return -1
+end
+redis.call('HINCRBY', KEYS[3], ARGV[1], tickets)
+return redis.call('INCRBY', KEYS[1], tickets)
+"""
+
+# KEYS: pending, flushing key, flushing set. Moves the pending counts aside and
+# registers them in one step, so a crash can't lose them in between.
+TAKE_PENDING_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('SADD', KEYS[3], KEYS[2])
+return 1
+"""
+
+# KEYS: flushing key, pending, flushing set. Adds the counts back to pending and
+# forgets the flushing key; running it twice on the same key is harmless.
+HAND_BACK_SCRIPT = """
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    redis.call('HINCRBY', KEYS[2], entries[i], entries[i + 1])
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[3], KEYS[1])
+return #entries / 2
+"""
+
+# KEYS: pending, flushing set; ARGV: company_uid. The company's tickets not in
+# Postgres yet (pending plus in-flight flushes), and the flushes in flight, read
+# in one step.
+UNFLUSHED_SCRIPT = """
+local total = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or 0)
+local flushing = redis.call('SMEMBERS', KEYS[2])
+for _, key in ipairs(flushing) do
+    total = total + tonumber(redis.call('HGET', key, ARGV[1]) or 0)
+end
+table.sort(flushing)
+return {total, flushing}
+"""
+
+# Every company with pending tickets in one statement
+FLUSH_STATEMENT = text("""
+    UPDATE companies
+    SET ticket_usage = companies.ticket_usage + pending.tickets
+    FROM unnest(CAST(:uids AS uuid[]), CAST(:tickets AS bigint[])) AS pending(uid, tickets)
+    WHERE companies.uid = pending.uid
+""")
+
+
+class TicketMeter:
+    """
+    Counts tickets per company in Redis and writes them to Postgres in batches.
+
+    Usage and limit are loaded from the companies table when a company is
+    metered and reloaded every `counter_ttl` seconds; in between a ticket
+    costs one Lua call. Tickets
+    also accumulate in a pending hash, which a background loop moves to
+    `companies.ticket_usage` every `flush_interval` seconds. Flushes left
+    unfinished for `orphan_after` seconds (the worker died) are handed back
+    to the pending hash.
+    """
+
+    def __init__(
+        self, flush_interval: float = 5, counter_ttl: int = 300, orphan_after: float = 300, prefix: str = KEY_PREFIX
+    ):
+        self.flush_interval = flush_interval
+        self.counter_ttl = counter_ttl
+        self.orphan_after = orphan_after
+        self.usage_key = f"{prefix}:usage:{{}}"
+        self.limit_key = f"{prefix}:limit:{{}}"
+        self.pending_key = f"{prefix}:pending"
+        self.flushing_set_key = f"{prefix}:flushing"
+        self._consume = redis_client.register_script(CONSUME_SCRIPT)
+        self._take_pending = redis_client.register_script(TAKE_PENDING_SCRIPT)
+        self._hand_back = redis_client.register_script(HAND_BACK_SCRIPT)
+        self._unflushed = redis_client.register_script(UNFLUSHED_SCRIPT)
+        self._task: Optional[asyncio.Task] = None
+        self._flushed = 0
+        self._flush_failures = 0
+        self._orphans_recovered = 0
+        self._last_flush: Optional[float] = None
+        self._last_sweep = 0.0
+
+    async def consume(self, company_uid: str, session: AsyncSession, tickets: int = 1) -> Optional[int]:
+        """
+        Take `tickets` from the company's monthly allowance. Returns the usage
+        afterwards, or None (taking nothing) if that would exceed the limit.
+        """
+        company_uid = str(company_uid)
+        keys = [self.usage_key.format(company_uid), self.limit_key.format(company_uid), self.pending_key]
+
+        for _ in range(3):
+            result = await self._consume(keys=keys, args=[company_uid, tickets])
+            if result == OVER_LIMIT:
+                return None
+            if result != NOT_LOADED:
+                return result
+            await self._load(company_uid, session)
+
+        raise RuntimeError(f"Could not load ticket counters for company {company_uid}")
+
+    async def _load(self, company_uid: str, session: AsyncSession) -> None:
+        statement = select(Company.ticket_usage, Company.monthly_ticket_limit).where(Company.uid == company_uid)
+        unflushed_keys = [self.pending_key, self.flushing_set_key]
+
+        for _ in range(3):
+            before = await self._unflushed(keys=unflushed_keys, args=[company_uid])
+            result = await session.exec(statement)
+            row = result.first()
+            if row is None:
+                raise CompanyNotFound()
+            after = await self._unflushed(keys=unflushed_keys, args=[company_uid])
+
+            # A flush that committed between the two reads would be in neither
+            # Postgres nor Redis; read again. One still in flight may be counted
+            # twice, which only errs on the safe side until the counter expires.
+            if before == after:
+                break
+        else:
+            raise RuntimeError(f"Ticket counters of company {company_uid} kept changing while loading")
+
+        usage, limit = row
+        pending = after[0]
+
+        pipe = redis_client.pipeline(transaction=True)
+        # NX: another worker may have loaded the counter and counted tickets already
+        pipe.set(self.usage_key.format(company_uid), usage + pending, nx=True, ex=self.counter_ttl)
+        pipe.set(self.limit_key.format(company_uid), limit, ex=self.counter_ttl)
+        await pipe.execute()
+
+    async def invalidate(self, company_uid: str) -> None:
+        """Reload usage and limit from Postgres on the next ticket, e.g. after the company is edited."""
+        company_uid = str(company_uid)
+        await redis_client.delete(self.usage_key.format(company_uid), self.limit_key.format(company_uid))
+
+    async def flush(self, session: AsyncSession) -> int:
+        """Write pending tickets to Postgres; returns how many were written."""
+        # Move the pending counts aside atomically; new tickets start a fresh hash
+        flushing_key = f"{self.pending_key}:flushing:{int(time.time())}:{uuid.uuid4()}"
+        if not await self._take_pending(keys=[self.pending_key, flushing_key, self.flushing_set_key]):
+            return 0
+
+        pending = await redis_client.hgetall(flushing_key)
+        uids = [uuid.UUID(company_uid.decode()) for company_uid in pending]
+        tickets = [int(count) for count in pending.values()]
+
+        try:
+            await session.execute(FLUSH_STATEMENT, {"uids": uids, "tickets": tickets})
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            # Hand the counts back so the next flush retries them
+            await self._hand_back(keys=[flushing_key, self.pending_key, self.flushing_set_key])
+            raise
+
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.delete(flushing_key)
+        pipe.srem(self.flushing_set_key, flushing_key)
+        await pipe.execute()
+        return sum(tickets)
+
+    async def recover_orphans(self) -> int:
+        """
+        Hand back flushes started more than `orphan_after` seconds ago, left
+        behind by a worker that died mid-flush. Returns how many were found.
+        """
+        cutoff = time.time() - self.orphan_after
+        recovered = 0
+        for flushing_key in await redis_client.smembers(self.flushing_set_key):
+            started = int(flushing_key.decode().split(":")[-2])
+            if started < cutoff:
+                await self._hand_back(keys=[flushing_key, self.pending_key, self.flushing_set_key])
+                logger.warning(f"Handed back orphaned ticket flush {flushing_key.decode()}")
+                recovered += 1
+
+        self._orphans_recovered += recovered
+        self._last_sweep = time.time()
+        return recovered
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self._recover_orphans_once()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Don't leave this worker's last tickets waiting for another worker's loop
+        await self._flush_once()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush_once()
+            # Orphans younger than orphan_after at startup are caught here
+            if time.time() - self._last_sweep >= self.orphan_after:
+                await self._recover_orphans_once()
+
+    async def _recover_orphans_once(self) -> None:
+        try:
+            await self.recover_orphans()
+        except Exception as e:
+            self._last_sweep = time.time()
+            logger.error(f"Recovering orphaned ticket flushes failed: {e}")
+
+    async def _flush_once(self) -> None:
+        try:
+            async with async_session() as session:
+                self._flushed += await self.flush(session)
+            self._last_flush = time.time()
+        except Exception as e:
+            self._flush_failures += 1
+            logger.error(f"Flushing ticket usage failed: {e}")
+
+    def metrics(self) -> dict:
+        return {
+            "flushed_tickets": self._flushed,
+            "flush_failures": self._flush_failures,
+            "orphaned_flushes_recovered": self._orphans_recovered,
+            "last_flush": self._last_flush,
+        }
+
+
+ticket_meter = TicketMeter(
+    flush_interval=Config.TICKET_FLUSH_INTERVAL,
+    counter_ttl=Config.TICKET_LIMIT_CACHE_TTL,
+    orphan_after=Config.TICKET_FLUSH_ORPHAN_AFTER,
+)
+
+register_metrics("ticket_meter", ticket_meter.metrics)
@@ -1,6 +1,7 @@
 # app/companies/models.py
 from sqlmodel import SQLModel, Field, Column, String, Relationship
 import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import Index
 # from app.auth.models import User
 # from app.billing.models import Billing
 from datetime import datetime
@@ -19,6 +20,11 @@ if TYPE_CHECKING:
     
 class Company(SQLModel, table=True):
     __tablename__ = "companies"
+    __table_args__ = (
+        # Keyset pagination of listings, newest first
+        Index("ix_companies_created_at_uid", "created_at", "uid"),
+        Index("ix_companies_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+    )
 
     uid: uuid.UUID = Field(
         sa_column=Column(
@@ -40,7 +46,8 @@ class Company(SQLModel, table=True):
     ticket_usage: int
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
     user: Optional["User"] = Relationship(back_populates="company")
-    data: List["TrainingDataSource"] = Relationship(back_populates="company", sa_relationship_kwargs={'lazy': 'selectin'})
+    # Loaded only on request, e.g. CompanyService.get_company(..., with_data=True)
+    data: List["TrainingDataSource"] = Relationship(back_populates="company", sa_relationship_kwargs={'lazy': 'raise', 'passive_deletes': True})
 
     # billing: Optional["Billing"] = Relationship(back_populates="company", sa_relationship_kwargs={"uselist": False})
     # billing: Optional["Billing"] = Relationship(
@@ -1,12 +1,14 @@
 # app/companies/routes.py
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query, Response
 from app.companies.service import CompanyService
 from app.db.database import get_db
 from app.companies.schemas import CompanyCreateModel, CompanyUpdateModel, Company, CompanyDetailModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.exceptions import HTTPException
-from typing import List
+from typing import List, Optional
 from app.auth.dependencies import AccessTokenBearer, RoleChecker
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from app.errors.exceptions import CompanyUpdateConflict, InvalidCursor
 
 
 
@@ -17,20 +19,36 @@ role_checker = Depends(RoleChecker(['admin', 'companyOwner', 'worker', 'user']))
 
 
 @company_router.get("/", response_model=List[Company], dependencies=[role_checker])
-async def get_all_companies(session: AsyncSession = Depends(get_db), 
+async def get_all_companies(response: Response,
+                            cursor: Optional[str] = None,
+                            limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                            session: AsyncSession = Depends(get_db), 
                             user_details=Depends(access_token_bearer)):
-    print(user_details)
-    companies = await company_service.get_all_companies(session)
+    try:
+        companies, next_cursor = await company_service.get_all_companies(session, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return companies
 
 
 @company_router.get("/user/{user_uid}", response_model=List[Company], dependencies=[role_checker])
 async def get_user_companies_submissions(
                             user_uid:str,
+                            response: Response,
+                            cursor: Optional[str] = None,
+                            limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
                             session: AsyncSession = Depends(get_db), 
                             user_details=Depends(access_token_bearer)):
-    print(user_details)
-    companies = await company_service.get_user_company(user_uid, session)
+    try:
+        companies, next_cursor = await company_service.get_user_company(user_uid, session, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return companies
 
 
@@ -43,7 +61,7 @@ async def create_a_company(company_data: CompanyCreateModel, session: AsyncSessi
 
 @company_router.get("/{company_uid}", response_model=CompanyDetailModel, dependencies=[role_checker])
 async def get_a_company(company_uid: str, session: AsyncSession = Depends(get_db), token_details: dict=Depends(access_token_bearer)):
-    company = await company_service.get_company(company_uid, session)
+    company = await company_service.get_company(company_uid, session, with_data=True)
 
     if company:
         return company
@@ -54,7 +72,10 @@ async def get_a_company(company_uid: str, session: AsyncSession = Depends(get_db
 
 @company_router.patch("/{company_uid}", response_model=Company, dependencies=[role_checker])
 async def update_a_company(company_uid: str, company_update_data: CompanyUpdateModel, session: AsyncSession = Depends(get_db), user_details=Depends(access_token_bearer)):
-    updated_company = await company_service.update_company(company_uid, company_update_data, session)
+    try:
+        updated_company = await company_service.update_company(company_uid, company_update_data, session)
+    except CompanyUpdateConflict:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Company was modified, reload and try again")
 
     if updated_company is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
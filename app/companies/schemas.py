@@ -1,6 +1,7 @@
 # app/companies/schemas.py
 from pydantic import BaseModel, EmailStr
-from pydantic import Field
+from pydantic import Field, field_validator, model_validator
+from typing import Optional
 import uuid
 from datetime import datetime
 from app.data.schemas import TrainingDataSourceRead
@@ -34,14 +35,33 @@ class CompanyCreateModel(BaseModel):
     ticket_usage: int 
 
 class CompanyUpdateModel(BaseModel):
-    name: str 
-    email: EmailStr
-    phone: str
-    industry: str
-    plan: str
-    is_active: bool
-    is_verified: bool 
-    monthly_ticket_limit: int 
-    ticket_usage: int 
+    """Partial update: only the fields that are sent change."""
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone: Optional[str] = None
+    industry: Optional[str] = None
+    plan: Optional[str] = None
+    is_active: Optional[bool] = None
+    is_verified: Optional[bool] = None
+    monthly_ticket_limit: Optional[int] = None
+    # No ticket_usage: the ticket meter is its only writer, and an absolute
+    # value would race with the tickets it adds on each flush
+    # The updated_at the client last saw; if sent, the update fails with 409
+    # when the company has changed since
+    updated_at: Optional[datetime] = None
 
+    @field_validator("updated_at")
+    @classmethod
+    def naive_updated_at(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # The column is a naive TIMESTAMP in server local time (datetime.now);
+        # asyncpg refuses to compare it with an aware value, e.g. one ending in "Z"
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
 
+    @model_validator(mode="after")
+    def reject_nulls(self):
+        for field in self.model_fields_set - {"phone", "updated_at"}:
+            if getattr(self, field) is None:
+                raise ValueError(f"{field} cannot be null")
+        return self
@@ -1,33 +1,48 @@
 # app/companies/service.py
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.companies.schemas import CompanyCreateModel, CompanyUpdateModel
-from sqlmodel import select, desc
+from sqlmodel import select, desc, update
+from datetime import datetime
+from sqlalchemy.orm import noload, selectinload
+from typing import Optional
+import logging
 from app.companies.models import Company
+from app.companies.metering import ticket_meter
+from app.core.pagination import DEFAULT_PAGE_SIZE, keyset_page, split_page
+from app.errors.exceptions import CompanyUpdateConflict
 
 class CompanyService:
-    async def get_all_companies(self, session: AsyncSession) -> list:
-        statement = select(Company).order_by(desc(Company.created_at))
+    async def get_all_companies(
+        self, session: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> tuple[list, Optional[str]]:
+        """One page of companies, newest first, and the cursor of the next page."""
+        statement = keyset_page(
+            select(Company).options(noload(Company.data)), Company.created_at, Company.uid, cursor, limit
+        )
 
         results = await session.exec(statement)
 
-        companies = results.all()
-
-        return companies
+        return split_page(results.all(), limit)
     
 
-    async def get_user_company(self, user_uid: str, session: AsyncSession) -> list:
-        statement = select(Company).where(Company.user_uid == user_uid).order_by(desc(Company.created_at))
+    async def get_user_company(
+        self, user_uid: str, session: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> tuple[list, Optional[str]]:
+        statement = keyset_page(
+            select(Company).where(Company.user_uid == user_uid).options(noload(Company.data)),
+            Company.created_at, Company.uid, cursor, limit
+        )
 
         results = await session.exec(statement)
 
-        companies = results.all()
-
-        return companies
+        return split_page(results.all(), limit)
 
-    async def get_company(self, company_uid: str, session: AsyncSession):
-        print(f"get_company called with {company_uid}")  # Debug log
+    async def get_company(self, company_uid: str, session: AsyncSession, with_data: bool = False):
         statement = select(Company).where(Company.uid == company_uid)
 
+        if with_data:
+            statement = statement.options(selectinload(Company.data))
+
         results = await session.exec(statement)
 
         company = results.first()
@@ -48,22 +63,40 @@ class CompanyService:
         return new_company
 
     async def update_company(self, company_uid: str, update_data: CompanyUpdateModel, session: AsyncSession):
-        company_to_update = await self.get_company(company_uid, session)
-
-
-        if company_to_update is not None:
+        """
+        Apply the fields that were sent in a single UPDATE ... RETURNING.
+        With `update_data.updated_at` the row must still carry that timestamp,
+        otherwise CompanyUpdateConflict is raised. Returns None if there is no
+        such company.
+        """
+        changes = update_data.model_dump(exclude_unset=True)
+        expected_updated_at = changes.pop("updated_at", None)
+
+        statement = update(Company).where(Company.uid == company_uid)
+        if expected_updated_at is not None:
+            statement = statement.where(Company.updated_at == expected_updated_at)
+
+        statement = statement.values(**changes, updated_at=datetime.now()).returning(Company)
+
+        result = await session.execute(statement)
+        company = result.scalars().first()
+
+        if company is None:
+            # Tell a missing company from a concurrent change; only on this rare path
+            if expected_updated_at is not None and await self.get_company(company_uid, session) is not None:
+                raise CompanyUpdateConflict()
+            return None
 
-            update_data_dict = update_data.model_dump()
+        await session.commit()
 
-            for k, v in update_data_dict.items():
-                setattr(company_to_update, k, v)
+        if "monthly_ticket_limit" in changes:
+            try:
+                await ticket_meter.invalidate(company_uid)
+            except Exception as e:
+                # The cached counters still expire after TICKET_LIMIT_CACHE_TTL
+                logging.warning(f"Invalidating ticket counters of company {company_uid} failed: {e}")
 
-            await session.commit()
-
-            return company_to_update
-        
-        else:
-            return None
+        return company
 
     async def delete_company(self, company_uid: str, session: AsyncSession):
         company_to_delete = await self.get_company(company_uid, session)
@@ -1,15 +1,41 @@
 # app/core/config.py
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Optional
 
 class Settings(BaseSettings):
     # PostgreSQL connection
     DATABASE_URL: str
 
+    # "pgbouncer": no client-side pool and no prepared statements (transaction pooler)
+    # "direct": pooled connections with asyncpg statement caching
+    DB_POOL_MODE: str = "pgbouncer"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: int = 30
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Query logging: SQLAlchemy echo is for local debugging only
+    DB_ECHO: bool = False
+    DB_QUERY_METRICS: bool = True
+    DB_SLOW_QUERY_MS: float = 200
+    DB_QUERY_LOG_SAMPLE_RATE: float = 0.0
+
     # Supabase REST access
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_JWT_SECRET: str
 
+    # File storage: "supabase" or "local" (filesystem, for tests)
+    STORAGE_BACKEND: str = "supabase"
+    STORAGE_BUCKET: str = "company-data"
+    STORAGE_LOCAL_ROOT: str = "storage"
+    STORAGE_MAX_CONNECTIONS: int = 20
+    STORAGE_RETRIES: int = 3
+    SIGNED_URL_EXPIRY: int = 3600
+    SIGNED_URL_SAFETY_MARGIN: int = 300  # stop handing out a URL this many seconds before it expires
+    SIGNED_URL_CACHE_SIZE: int = 10000
+
     ASTRA_DB_API_ENDPOINT: str
     ASTRA_DB_APPLICATION_TOKEN: str
     ASTRA_DB_KEYSPACE: str
@@ -17,10 +43,55 @@ class Settings(BaseSettings):
     # JWT auth for your FastAPI app
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
+    TOKEN_CACHE_SIZE: int = 4096
+
+    # Password hashing; changing BCRYPT_ROUNDS rehashes passwords on next login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
 
     REDIS_HOST: str = 'localhost'
     REDIS_PORT: int = 6379
 
+    # Authenticated user cache
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: float = 30
+    USER_CACHE_REDIS: bool = False
+
+    # Embeddings
+    EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_MAX_MODELS: int = 2
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_MAX_WAIT_MS: int = 10
+    EMBEDDING_WORKERS: int = 1
+
+    # Background ingestion
+    INGESTION_WORKERS: int = 2
+    INGESTION_QUEUE_SIZE: int = 100
+    INGESTION_STALE_AFTER: float = 900  # seconds without progress before a "processing" source counts as dead
+    CHUNK_INSERT_MODE: str = "insert"  # "insert" (multi-row INSERT) or "copy" (PostgreSQL COPY)
+    CHUNK_INSERT_BATCH_SIZE: int = 1000  # rows per statement; ingestion writes CHUNK_BATCH_SIZE rows at a time anyway
+
+    # Chunking, in tokens of the embedding model's tokenizer
+    CHUNK_MAX_TOKENS: Optional[int] = None  # None = the model's max_seq_length
+    CHUNK_OVERLAP_TOKENS: int = 32
+    CHUNK_TOKENIZE_BATCH: int = 256
+
+    # Vector search
+    SEARCH_MAX_QUERIES: int = 32
+    SEARCH_MAX_LIMIT: int = 50
+    SEARCH_CACHE_SIZE: int = 2048
+    SEARCH_CACHE_TTL: float = 60
+
+    # Ticket metering
+    TICKET_FLUSH_INTERVAL: float = 5  # seconds between writes of ticket usage to Postgres
+    TICKET_LIMIT_CACHE_TTL: int = 300  # seconds before cached limit and usage are reloaded from Postgres
+    TICKET_FLUSH_ORPHAN_AFTER: float = 300  # seconds before an unfinished flush is handed back
+
+    # PDF extraction
+    PDF_EXTRACT_WORKERS: int = 4  # worker processes; 0 extracts every PDF in-process
+    PDF_PARALLEL_MIN_PAGES: int = 50
+    PDF_PAGES_PER_TASK: int = 25
+
 
     model_config = SettingsConfigDict(
         env_file=".env",
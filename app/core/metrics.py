@@ -0,0 +1,13 @@
+# app/core/metrics.py
+from typing import Callable
+
+# name -> zero-argument callable returning a JSON-serializable dict
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], dict]) -> None:
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict:
+    return {name: provider() for name, provider in _providers.items()}
@@ -0,0 +1,63 @@
+# app/core/pagination.py
+from datetime import datetime
+from typing import Callable, Optional, Sequence
+import base64
+import uuid
+
+from sqlalchemy import tuple_
+
+from app.errors.exceptions import InvalidCursor
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Paginated listings return the cursor of the next page (if any) in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, uid: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{uid}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, uid = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(uid)
+    except ValueError as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_after(statement, created_column, uid_column, cursor: Optional[str]):
+    """Rows of `statement` that come after `cursor` in newest-first order."""
+    if not cursor:
+        return statement
+
+    created_at, uid = decode_cursor(cursor)
+    return statement.where(tuple_(created_column, uid_column) < tuple_(created_at, uid))
+
+
+def keyset_page(statement, created_column, uid_column, cursor: Optional[str], limit: int):
+    """
+    Newest-first page of `statement` after `cursor`. Compares (created_at, uid)
+    as a row value so PostgreSQL can seek straight to the cursor in an index
+    on those columns, however deep the page. Fetches one extra row so
+    `split_page` can tell whether another page exists.
+    """
+    statement = keyset_after(statement, created_column, uid_column, cursor)
+    return statement.order_by(created_column.desc(), uid_column.desc()).limit(limit + 1)
+
+
+def split_page(
+    rows: Sequence,
+    limit: int,
+    key: Callable = lambda row: (row.created_at, row.uid)
+) -> tuple[list, Optional[str]]:
+    """(rows of this page, cursor of the next page or None)."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
@@ -0,0 +1,197 @@
+# app/data/chunking.py
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+import copy
+import re
+import threading
+
+from app.core.config import Config
+from app.data.embeddings import embedding_registry
+from app.data.utils import Piece
+
+# Sentence ends (., ! or ? followed by whitespace) and paragraph breaks
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+# Text without any boundary is cut here so a document without punctuation
+# doesn't have to be held in memory whole
+MAX_PENDING_CHARS = 20_000
+
+
+@dataclass
+class Chunk:
+    text: str
+    token_count: int
+    page_number: Optional[int] = None
+
+
+@dataclass
+class _Segment:
+    page_number: Optional[int]
+    text: str
+    token_count: int = 0
+
+
+def iter_segments(pieces: Iterable[Piece]) -> Iterator[tuple[Optional[int], str]]:
+    """
+    Re-split a stream of (page_number, text) pieces into sentences and
+    paragraphs, with whitespace collapsed. A sentence that runs across pieces
+    is yielded once it is complete, tagged with the page it starts on.
+    """
+    pending = ""
+    pending_page = None
+
+    for page, text in pieces:
+        if not pending.strip():
+            pending, pending_page = "", page
+        pending += text
+
+        start = 0
+        segment_page = pending_page
+        for match in _BOUNDARY.finditer(pending):
+            segment = " ".join(pending[start:match.start()].split())
+            if segment:
+                yield segment_page, segment
+            start = match.end()
+            # Everything after the first boundary comes from this piece
+            segment_page = page
+
+        pending = pending[start:]
+        pending_page = segment_page
+
+        if len(pending) > MAX_PENDING_CHARS:
+            yield pending_page, " ".join(pending.split())
+            pending = ""
+
+    segment = " ".join(pending.split())
+    if segment:
+        yield pending_page, segment
+
+
+class TokenChunker:
+    """
+    Packs sentences into chunks of at most `max_tokens` tokens of the
+    embedding model's own tokenizer, so nothing is silently truncated at
+    encode time. Consecutive chunks share up to `overlap` tokens of whole
+    sentences; a single sentence longer than `max_tokens` is cut into token
+    windows instead.
+
+    Segments are tokenized `tokenize_batch` at a time with the fast (Rust)
+    tokenizer. The chunker keeps its own copy of the tokenizer: the model's
+    instance has truncation switched on by every encode call.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int, overlap: int = 0, tokenize_batch: int = 256):
+        if overlap >= max_tokens:
+            raise ValueError(f"Chunk overlap ({overlap}) must be smaller than chunk size ({max_tokens})")
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.tokenize_batch = tokenize_batch
+        self._lock = threading.Lock()
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        with self._lock:
+            encoded = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    def _split_long(self, segment: _Segment) -> Iterator[Chunk]:
+        with self._lock:
+            offsets = self.tokenizer(
+                segment.text, add_special_tokens=False, return_offsets_mapping=True
+            )["offset_mapping"]
+
+        step = self.max_tokens - self.overlap
+        for start in range(0, len(offsets), step):
+            window = offsets[start:start + self.max_tokens]
+            yield Chunk(
+                text=segment.text[window[0][0]:window[-1][1]],
+                token_count=len(window),
+                page_number=segment.page_number,
+            )
+            if start + self.max_tokens >= len(offsets):
+                break
+
+    def _tokenized(self, pieces: Iterable[Piece]) -> Iterator[_Segment]:
+        batch: List[_Segment] = []
+        for page, text in iter_segments(pieces):
+            batch.append(_Segment(page, text))
+            if len(batch) >= self.tokenize_batch:
+                yield from self._count(batch)
+                batch = []
+        if batch:
+            yield from self._count(batch)
+
+    def _count(self, batch: List[_Segment]) -> List[_Segment]:
+        for segment, count in zip(batch, self.count_tokens([segment.text for segment in batch])):
+            segment.token_count = count
+        return batch
+
+    @staticmethod
+    def _join(segments: List[_Segment], total: int) -> Chunk:
+        return Chunk(
+            text=" ".join(segment.text for segment in segments),
+            token_count=total,
+            page_number=segments[0].page_number,
+        )
+
+    def chunks(self, pieces: Iterable[Piece]) -> Iterator[Chunk]:
+        current: List[_Segment] = []
+        total = 0
+        # Whether `current` holds anything beyond the overlap already emitted
+        fresh = False
+
+        for segment in self._tokenized(pieces):
+            if segment.token_count > self.max_tokens:
+                if fresh:
+                    yield self._join(current, total)
+                yield from self._split_long(segment)
+                current, total, fresh = [], 0, False
+                continue
+
+            if total + segment.token_count > self.max_tokens:
+                if fresh:
+                    yield self._join(current, total)
+
+                # Carry the trailing sentences that fit in the overlap
+                kept = 0
+                keep_from = len(current)
+                while keep_from > 0 and kept + current[keep_from - 1].token_count <= self.overlap:
+                    keep_from -= 1
+                    kept += current[keep_from].token_count
+                current, total = current[keep_from:], kept
+
+                while current and total + segment.token_count > self.max_tokens:
+                    total -= current.pop(0).token_count
+
+            current.append(segment)
+            total += segment.token_count
+            fresh = True
+
+        if fresh:
+            yield self._join(current, total)
+
+
+_chunkers: dict[str, TokenChunker] = {}
+_chunkers_lock = threading.Lock()
+
+
+def get_chunker(model_name: Optional[str] = None) -> TokenChunker:
+    """Chunker sized for `model_name`: CHUNK_MAX_TOKENS, capped at what the model reads."""
+    model_name = model_name or Config.EMBEDDING_MODEL_NAME
+
+    with _chunkers_lock:
+        chunker = _chunkers.get(model_name)
+        if chunker is None:
+            model = embedding_registry.get(model_name)
+            tokenizer = copy.deepcopy(model.tokenizer)
+            # [CLS]/[SEP] and friends count towards the model's limit
+            model_limit = model.max_seq_length - tokenizer.num_special_tokens_to_add(pair=False)
+            max_tokens = min(Config.CHUNK_MAX_TOKENS or model_limit, model_limit)
+
+            chunker = _chunkers[model_name] = TokenChunker(
+                tokenizer,
+                max_tokens=max_tokens,
+                overlap=min(Config.CHUNK_OVERLAP_TOKENS, max_tokens // 2),
+                tokenize_batch=Config.CHUNK_TOKENIZE_BATCH,
+            )
+        return chunker
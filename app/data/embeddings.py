@@ -0,0 +1,247 @@
+# app/data/embeddings.py
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+import asyncio
+import logging
+import threading
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# On-disk format of stored embeddings: packed little-endian float32
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def pack_embedding(vector) -> bytes:
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def unpack_embedding(data: bytes) -> np.ndarray:
+    """Read-only float32 view over the stored bytes; nothing is copied."""
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE)
+
+
+class EmbeddingModelRegistry:
+    """
+    Process-wide cache of loaded SentenceTransformer models.
+
+    Models are loaded once, warmed up with a dummy encode and kept in LRU
+    order; when more than `max_models` are loaded the least recently used
+    one is dropped.
+    """
+
+    def __init__(self, max_models: int = 2):
+        self.max_models = max_models
+        self._models: "OrderedDict[str, SentenceTransformer]" = OrderedDict()
+        self._loading: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: Optional[str] = None) -> SentenceTransformer:
+        model_name = model_name or Config.EMBEDDING_MODEL_NAME
+
+        with self._lock:
+            model = self._cached(model_name)
+            if model is not None:
+                return model
+            load_lock = self._loading.setdefault(model_name, threading.Lock())
+
+        # Load outside the registry lock so threads using models that are
+        # already loaded aren't held up; concurrent loads of the same model
+        # wait for the first one
+        with load_lock:
+            with self._lock:
+                model = self._cached(model_name)
+                if model is not None:
+                    return model
+
+            model = self._load(model_name)
+
+            with self._lock:
+                self._models[model_name] = model
+                self._loading.pop(model_name, None)
+
+                while len(self._models) > self.max_models:
+                    evicted_name, _ = self._models.popitem(last=False)
+                    logger.info(f"Evicted embedding model {evicted_name}")
+
+            return model
+
+    def _cached(self, model_name: str) -> Optional[SentenceTransformer]:
+        # Caller holds self._lock
+        model = self._models.get(model_name)
+        if model is not None:
+            self._models.move_to_end(model_name)
+        return model
+
+    def dimension(self, model_name: Optional[str] = None) -> int:
+        return self.get(model_name).get_sentence_embedding_dimension()
+
+    def loaded_models(self) -> list[str]:
+        with self._lock:
+            return list(self._models.keys())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def _load(self, model_name: str) -> SentenceTransformer:
+        logger.info(f"Loading embedding model {model_name}")
+        model = SentenceTransformer(model_name)
+        # The first encode allocates buffers and compiles kernels; pay for it here
+        # rather than on the first upload.
+        model.encode(["warm up"])
+        return model
+
+
+@dataclass
+class _EncodeRequest:
+    model_name: str
+    texts: list[str]
+    future: asyncio.Future
+
+
+class EmbeddingExecutor:
+    """
+    Runs model.encode off the event loop.
+
+    Requests from concurrent callers are queued and coalesced into one encode
+    call per model, until either `max_batch_size` texts are collected or
+    `max_wait_ms` has passed since the first request of the batch. Each caller
+    awaits its own future and gets back only its rows.
+    """
+
+    def __init__(
+        self,
+        registry: EmbeddingModelRegistry,
+        max_batch_size: int = 64,
+        max_wait_ms: int = 10,
+        workers: int = 1,
+    ):
+        self.registry = registry
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._dispatcher is not None:
+            return
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embedding")
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self) -> None:
+        if self._dispatcher is None:
+            return
+        self._dispatcher.cancel()
+        try:
+            await self._dispatcher
+        except asyncio.CancelledError:
+            pass
+
+        while not self._queue.empty():
+            request = self._queue.get_nowait()
+            if not request.future.done():
+                request.future.set_exception(RuntimeError("Embedding executor stopped"))
+
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._dispatcher = None
+        self._queue = None
+        self._pool = None
+
+    async def encode(self, texts: list[str], model_name: Optional[str] = None) -> np.ndarray:
+        model_name = model_name or Config.EMBEDDING_MODEL_NAME
+
+        if not texts:
+            # May load the model; keep that off the event loop
+            dimension = await asyncio.to_thread(self.registry.dimension, model_name)
+            return np.empty((0, dimension), dtype=np.float32)
+
+        await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_EncodeRequest(model_name, list(texts), future))
+        return await future
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _dispatch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # Wait for a free worker first so requests keep piling up in the
+            # queue (and get batched together) while all workers are busy.
+            await self._slots.acquire()
+
+            batch = [await self._queue.get()]
+            batch_size = len(batch[0].texts)
+            deadline = loop.time() + self.max_wait
+
+            while batch_size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                batch_size += len(request.texts)
+
+            task = loop.run_in_executor(self._pool, self._encode_batch, batch)
+            task.add_done_callback(lambda _: self._slots.release())
+
+    def _encode_batch(self, batch: list[_EncodeRequest]) -> None:
+        by_model: dict[str, list[_EncodeRequest]] = {}
+        for request in batch:
+            by_model.setdefault(request.model_name, []).append(request)
+
+        for model_name, requests in by_model.items():
+            try:
+                model = self.registry.get(model_name)
+                texts = [text for request in requests for text in request.texts]
+                vectors = model.encode(texts, batch_size=self.max_batch_size, convert_to_numpy=True)
+            except Exception as e:
+                for request in requests:
+                    self._resolve(request, exception=e)
+                continue
+
+            offset = 0
+            for request in requests:
+                count = len(request.texts)
+                self._resolve(request, result=vectors[offset:offset + count])
+                offset += count
+
+    @staticmethod
+    def _resolve(request: _EncodeRequest, result=None, exception: Optional[Exception] = None) -> None:
+        def set_outcome():
+            # The caller may have gone away (e.g. client disconnected)
+            if request.future.done():
+                return
+            if exception is not None:
+                request.future.set_exception(exception)
+            else:
+                request.future.set_result(result)
+
+        request.future.get_loop().call_soon_threadsafe(set_outcome)
+
+
+embedding_registry = EmbeddingModelRegistry(max_models=Config.EMBEDDING_MAX_MODELS)
+
+embedding_executor = EmbeddingExecutor(
+    embedding_registry,
+    max_batch_size=Config.EMBEDDING_BATCH_SIZE,
+    max_wait_ms=Config.EMBEDDING_MAX_WAIT_MS,
+    workers=Config.EMBEDDING_WORKERS,
+)
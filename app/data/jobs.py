@@ -0,0 +1,188 @@
+# app/data/jobs.py
+from dataclasses import dataclass
+from typing import Optional
+import asyncio
+import logging
+import os
+import uuid
+
+from app.core.config import Config
+from app.db.database import async_session
+from app.db.storage import signed_urls, storage
+from app.data.service import TrainingDataService
+from app.data.utils import IngestionStats, extract_text_stream
+
+logger = logging.getLogger(__name__)
+
+data_service = TrainingDataService()
+
+
+class IngestionQueueFull(Exception):
+    """The ingestion queue is at capacity; the caller should retry later."""
+    pass
+
+
+@dataclass
+class IngestionJob:
+    source_uid: uuid.UUID
+    company_uid: str
+    tmp_path: str  # spooled upload, removed once the job finishes
+    file_path: str  # destination path in storage
+    content_type: str
+    file_size: int = 0
+
+
+async def _mark_failed(job: IngestionJob, session, error: str) -> None:
+    try:
+        await session.rollback()
+        await data_service.set_status(job.source_uid, "failed", session, error=error)
+        await data_service.discard_chunks(job.source_uid, job.company_uid, session)
+    except Exception as cleanup_error:
+        logger.error(f"Cleanup after failed ingestion of {job.source_uid} failed: {cleanup_error}")
+
+
+async def fail_stale_jobs(stale_after: float = Config.INGESTION_STALE_AFTER) -> None:
+    """
+    Mark sources left "processing" by a worker that died (no progress for
+    `stale_after` seconds) as failed, and drop what they stored. Only stale
+    rows a worker had started are touched, so jobs of other live workers,
+    running or still "queued", are left alone.
+    """
+    async with async_session() as session:
+        stale = await data_service.fail_stale_sources(session, stale_after, error="Ingestion was interrupted")
+        for source_uid, company_uid in stale:
+            try:
+                await data_service.discard_chunks(source_uid, company_uid, session)
+            except Exception as e:
+                logger.error(f"Cleanup of interrupted ingestion {source_uid} failed: {e}")
+
+    if stale:
+        logger.warning(f"Marked {len(stale)} interrupted ingestions as failed")
+
+
+async def run_ingestion_job(job: IngestionJob) -> None:
+    """Extract, store, chunk and embed one upload, tracking status on its TrainingDataSource."""
+    stats = IngestionStats(bytes_read=job.file_size)
+
+    async with async_session() as session:
+        try:
+            # Until now the source was "queued"; only "processing" rows count towards the stale sweep
+            await data_service.set_status(job.source_uid, "processing", session)
+
+            pieces = await asyncio.to_thread(extract_text_stream, job.tmp_path, job.content_type)
+
+            await storage.upload(job.file_path, job.tmp_path, job.content_type)
+            # Also checks the object is readable, and warms the cache for listings
+            await signed_urls.get(job.file_path)
+
+            await data_service.ingest_text_stream(
+                source_uid=job.source_uid,
+                company_uid=job.company_uid,
+                pieces=pieces,
+                session=session,
+                stats=stats
+            )
+            await data_service.set_status(job.source_uid, "processed", session)
+            logger.info(f"Ingested {job.source_uid}: {stats.as_dict()}")
+
+        except asyncio.CancelledError:
+            # Shutdown: don't leave the source "processing" forever
+            logger.warning(f"Ingestion of {job.source_uid} was interrupted")
+            await _mark_failed(job, session, "Ingestion was interrupted")
+            raise
+
+        except Exception as e:
+            logger.exception(f"Ingestion failed for {job.source_uid}: {e}")
+            await _mark_failed(job, session, str(e))
+
+        finally:
+            os.remove(job.tmp_path)
+
+
+# Companies with a reindex queued or running in this process
+_reindexing: set[str] = set()
+
+
+def claim_reindex(company_uid: str) -> bool:
+    """Reserve a reindex of the company; False if one is already underway."""
+    company_uid = str(company_uid)
+    if company_uid in _reindexing:
+        return False
+    _reindexing.add(company_uid)
+    return True
+
+
+async def run_reindex_job(company_uid: str, model_name: str, collection_name: Optional[str] = None) -> None:
+    """Reindex a company claimed with claim_reindex, with its own session; failures are logged."""
+    try:
+        async with async_session() as session:
+            await data_service.reindex_company(
+                company_uid, session, model_name=model_name, collection_name=collection_name
+            )
+    except Exception as e:
+        logger.exception(f"Reindexing company {company_uid} failed: {e}")
+    finally:
+        _reindexing.discard(str(company_uid))
+
+
+class IngestionQueue:
+    """
+    In-process ingestion queue drained by a fixed number of asyncio workers.
+
+    The heavy parts of a job (extraction, encode, storage and Qdrant calls) run
+    in threads, so the workers only coordinate and the event loop stays free.
+    """
+
+    def __init__(self, workers: int = 2, max_size: int = 100):
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Jobs never started would otherwise stay "queued" forever
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            async with async_session() as session:
+                await _mark_failed(job, session, "Ingestion was interrupted")
+            os.remove(job.tmp_path)
+
+    def is_full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    async def submit(self, job: IngestionJob) -> None:
+        await self.start()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise IngestionQueueFull()
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await run_ingestion_job(job)
+            except Exception as e:
+                logger.exception(f"Ingestion worker error: {e}")
+            finally:
+                self._queue.task_done()
+
+
+ingestion_queue = IngestionQueue(
+    workers=Config.INGESTION_WORKERS,
+    max_size=Config.INGESTION_QUEUE_SIZE,
+)
@@ -1,5 +1,6 @@
 # app/data/models.py
 from sqlmodel import SQLModel, Field, Column, Relationship
+from sqlalchemy import Index, text
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 import sqlalchemy.dialects.postgresql as pg
@@ -12,6 +13,13 @@ if TYPE_CHECKING:
     from app.companies.models import Company
 class TrainingDataSource(SQLModel, table=True):
     __tablename__ = "training_data_sources"
+    __table_args__ = (
+        # Keyset pagination of a company's files, newest first
+        Index(
+            "ix_training_data_sources_company_uid_created_at",
+            "company_uid", text("created_at DESC"), text("uid DESC")
+        ),
+    )
 
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     
@@ -22,7 +30,10 @@ class TrainingDataSource(SQLModel, table=True):
     name: str  # file name
     source_url: Optional[str] = None  # for web-based sources
     file_path: Optional[str] = None  # path in Supabase
-    status: str = Field(default="processed")  # or "uploaded", "processing"
+    content_hash: Optional[str] = Field(default=None, index=True)  # SHA-256 of the uploaded file
+    status: str = Field(default="processed")  # or "uploaded", "queued", "processing", "failed"
+    progress: int = Field(default=0)  # chunks stored and embedded so far
+    error: Optional[str] = None  # why ingestion failed, when status == "failed"
     user: Optional["User"] = Relationship(back_populates="data")
     company: Optional["Company"] = Relationship(back_populates="data")
 
@@ -34,17 +45,25 @@ class TrainingDataSource(SQLModel, table=True):
 
 class TrainingDataChunk(SQLModel, table=True):
     __tablename__ = "training_data_chunks"
+    __table_args__ = (
+        # Embedding cache lookups: (model, text hash) -> embedding
+        Index("ix_training_data_chunks_embedding_model_content_hash", "embedding_model", "content_hash"),
+    )
 
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
 
     source_uid: uuid.UUID = Field(foreign_key="training_data_sources.uid", nullable=False)
 
     content: str  # the actual chunk text
-    embedding: Optional[List[float]] = Field(
-        sa_column=Column(pg.ARRAY(pg.FLOAT))
+    content_hash: Optional[str] = Field(default=None, index=True)  # SHA-256 of `content`
+    # float32 vector packed by app.data.embeddings.pack_embedding (4 bytes per dimension)
+    embedding: Optional[bytes] = Field(
+        default=None, sa_column=Column(pg.BYTEA)
     )
+    embedding_model: Optional[str] = None  # model that produced `embedding`
     token_count: Optional[int] = None
     chunk_index: int  # the order of chunk in the file
+    page_number: Optional[int] = None  # page the chunk starts on (PDFs only)
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -1,107 +1,81 @@
 # app/data/routes.py
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException, Query, Response, status
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.db.database import get_db, supabase
-from app.auth.dependencies import AccessTokenBearer
+from app.db.database import get_db, async_session
+from app.db.storage import signed_urls
+from fastapi.responses import StreamingResponse
+from app.auth.dependencies import AccessTokenBearer, RoleChecker
+from app.core.config import Config
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor
+from app.errors.exceptions import InvalidCursor
 from app.data.schemas import TrainingDataSourceCreate, TrainingDataSourceRead, TrainingDataSourceUpdate
 from app.data.service import TrainingDataService
 from app.data.models import TrainingDataChunk, TrainingDataSource
 import uuid
 from datetime import datetime
 from app.auth.dependencies import AccessTokenBearer
-from app.data.schemas import TrainingDataSourceCreate, TrainingDataSourceRead
+from app.data.schemas import TrainingDataSourceCreate, TrainingDataSourceRead, TrainingDataSourceStatus
+from app.data.schemas import SearchQuery, SearchResult
 from app.data.service import TrainingDataService
-from app.data.models import TrainingDataChunk
+from app.data.utils import is_supported_type, spool_upload
+from app.data.jobs import IngestionJob, IngestionQueueFull, claim_reindex, ingestion_queue, run_reindex_job
+from app.data.vectors import COMPANY_COLLECTION_PREFIX, collection_name_for
 from app.auth.roles import admin_only, company_roles, all_roles, user_only
 from app.companies.service import CompanyService
 from app.auth.service import UserService
 import logging
 
 
-from typing import List
-import fitz  # PyMuPDF
-import docx
-import io
+from typing import List, Optional
+import asyncio
+import os
+
+STATUS_POLL_INTERVAL = 1  # seconds between status checks for the SSE stream
 
 router = APIRouter()
 data_service = TrainingDataService()
 company_service = CompanyService()
 user_service = UserService()
+admin_checker = Depends(RoleChecker(['admin']))
 
 
-def chunk_text(text: str, max_tokens: int = 500) -> List[str]:
-    words = text.split()
-    return [" ".join(words[i:i + max_tokens]) for i in range(0, len(words), max_tokens)]
-
-
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    text = ""
-    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
-        for page in doc:
-            text += page.get_text()
-    return text
-
-
-def extract_text_from_docx(file_bytes: bytes) -> str:
-    file_stream = io.BytesIO(file_bytes)
-    doc = docx.Document(file_stream)
-    return "\n".join([para.text for para in doc.paragraphs])
-
-
-def extract_text(file: UploadFile, file_bytes: bytes) -> str:
-    content_type = file.content_type
-
-    if content_type == "application/pdf":
-        return extract_text_from_pdf(file_bytes)
-    elif content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        return extract_text_from_docx(file_bytes)
-    elif content_type.startswith("text/"):
-        return file_bytes.decode("utf-8", errors="ignore")
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported file type: {content_type}")
-
-
-
-@router.post("/upload/{company_uid}", response_model=TrainingDataSourceRead)
+@router.post("/upload/{company_uid}", response_model=TrainingDataSourceRead, status_code=status.HTTP_202_ACCEPTED)
 async def upload_file_for_company(
     company_uid: str,
+    response: Response,
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_db),
     token_details: dict = Depends(AccessTokenBearer())
 ):
-    try:
-        logging.info(f"Upload started for company_uid={company_uid} file={file.filename}")
-
-        file_bytes = await file.read()
+    if not is_supported_type(file.content_type):
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.content_type}")
 
-        try:
-            file_text = extract_text(file, file_bytes)
-            logging.info(f"Extracted text length: {len(file_text)}")
-        except Exception as e:
-            logging.error(f"Text extraction failed: {e}")
-            raise HTTPException(status_code=400, detail=f"Text extraction failed: {str(e)}")
-
-        file_path = f"{company_uid}/{uuid.uuid4()}_{file.filename}"
-        logging.info(f"Uploading file to path: {file_path}")
+    if ingestion_queue.is_full():
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, please retry later")
 
-        response = supabase.storage.from_("company-data").upload(file_path, file_bytes)
+    logging.info(f"Upload started for company_uid={company_uid} file={file.filename}")
 
-        if not hasattr(response, "path") or not response.path:
-            logging.error(f"Upload failed, response: {response}")
-            raise HTTPException(status_code=500, detail="❌ Upload failed: No path in response")
+    # Never hold the whole file in memory: spool it to disk and let the worker read it
+    tmp_path, file_size, file_hash = await spool_upload(file)
 
-        signed_url_response = supabase.storage.from_("company-data").create_signed_url(file_path, 3600)
+    try:
+        # Same bytes already uploaded: nothing to extract, store or embed again
+        existing = await data_service.find_source_by_hash(company_uid, file_hash, session)
+        if existing:
+            os.remove(tmp_path)
+            logging.info(f"Upload of {file.filename} matches source_uid={existing.uid}, skipping ingestion")
+            response.status_code = status.HTTP_200_OK
+            return existing
 
-        if not signed_url_response or not signed_url_response.get("signedURL"):
-            logging.error(f"Signed URL generation failed, response: {signed_url_response}")
-            raise HTTPException(status_code=500, detail="❌ Failed to generate signed URL")
+        file_path = f"{company_uid}/{uuid.uuid4()}_{file.filename}"
 
         source_data = TrainingDataSourceCreate(
             name=file.filename,
             type=file.content_type,
             file_path=file_path,
             company_uid=company_uid,
-            status="uploaded"
+            status="queued",
+            content_hash=file_hash
         )
 
         new_source = await data_service.create_data_source(
@@ -110,49 +84,149 @@ async def upload_file_for_company(
             data=source_data,
             session=session
         )
+    except Exception:
+        os.remove(tmp_path)
+        raise
 
-        chunks = chunk_text(file_text)
-        logging.info(f"Chunked text into {len(chunks)} chunks")
+    try:
+        await ingestion_queue.submit(IngestionJob(
+            source_uid=new_source.uid,
+            company_uid=company_uid,
+            tmp_path=tmp_path,
+            file_path=file_path,
+            content_type=file.content_type,
+            file_size=file_size
+        ))
+    except IngestionQueueFull:
+        os.remove(tmp_path)
+        await data_service.set_status(new_source.uid, "failed", session, error="Ingestion queue is full")
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, please retry later")
 
-        for idx, chunk in enumerate(chunks):
-            new_chunk = TrainingDataChunk(
-                source_uid=new_source.uid,
-                content=chunk,
-                chunk_index=idx,
-                token_count=len(chunk.split())
-            )
-            session.add(new_chunk)
+    logging.info(f"Upload queued for ingestion: source_uid={new_source.uid}")
 
-        await session.commit()
+    return new_source
 
-        # ✅ Qdrant vector embedding step goes HERE
-        await data_service.process_chunks_for_vector_search(
-            source_uid=new_source.uid,
-            chunks=chunks,
-            company_uid=company_uid,
-            # session=session 
-        )
 
-        logging.info("Upload, DB commit, and Qdrant embedding successful")
+@router.get("/files/{file_uid}/status", response_model=TrainingDataSourceStatus)
+async def get_file_status(
+    file_uid: str,
+    session: AsyncSession = Depends(get_db),
+    token_details: dict = Depends(AccessTokenBearer())
+):
+    file_obj = await data_service.get_data_source(file_uid, session)
+    if not file_obj:
+        raise HTTPException(status_code=404, detail="File not found")
+    return file_obj
 
-        return new_source
 
-    except HTTPException:
-        raise
+@router.get("/files/{file_uid}/events")
+async def stream_file_status(
+    file_uid: str,
+    session: AsyncSession = Depends(get_db),
+    token_details: dict = Depends(AccessTokenBearer())
+):
+    """Server-sent events with the ingestion status, until it is processed or failed."""
+    if not await data_service.get_data_source(file_uid, session):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    async def events():
+        last_event = None
+        while True:
+            # The request session is closed once the response starts; poll with our own
+            async with async_session() as poll_session:
+                file_obj = await data_service.get_data_source(file_uid, poll_session)
+
+            if file_obj is None:
+                yield "event: deleted\ndata: {}\n\n"
+                return
+
+            event = TrainingDataSourceStatus.model_validate(file_obj).model_dump_json()
+            if event != last_event:
+                yield f"data: {event}\n\n"
+                last_event = event
+
+            if file_obj.status in ("processed", "failed"):
+                return
+
+            await asyncio.sleep(STATUS_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.post("/search/{company_uid}", response_model=List[SearchResult])
+async def search_company_data(
+    company_uid: str,
+    search_query: SearchQuery,
+    token_details: dict = Depends(AccessTokenBearer())
+):
+    results = await data_service.search(
+        company_uid,
+        search_query.queries,
+        limit=search_query.limit,
+        source_uids=search_query.source_uids
+    )
+    return [
+        SearchResult(query=query, hits=hits)
+        for query, hits in zip(search_query.queries, results)
+    ]
+
+
+async def _with_signed_urls(files: List[TrainingDataSource]) -> List[TrainingDataSourceRead]:
+    # One storage call for all cache misses instead of one per file
+    try:
+        urls = await signed_urls.get_many([f.file_path for f in files if f.file_path])
     except Exception as e:
-        logging.error(f"Unexpected error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logging.warning(f"Signing file URLs failed: {e}")
+        urls = {}
 
+    return [
+        TrainingDataSourceRead.model_validate(f).model_copy(update={"signed_url": urls.get(f.file_path)})
+        for f in files
+    ]
 
 
 @router.get("/files/{company_uid}", response_model=List[TrainingDataSourceRead])
 async def get_files_for_company(
     company_uid: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    file_status: Optional[str] = Query(default=None, alias="status"),
+    file_type: Optional[str] = Query(default=None, alias="type"),
+    format: str = Query(default="json", pattern="^(json|ndjson)$"),
     session: AsyncSession = Depends(get_db),
     token_details: dict = Depends(AccessTokenBearer())
 ):
-    files = await data_service.get_data_sources_for_company(company_uid, session)
-    return files
+    """
+    A page of the company's files, newest first; the next page's cursor is in
+    the X-Next-Cursor header. With format=ndjson every matching file after
+    `cursor` is streamed instead, one JSON object per line.
+    """
+    try:
+        if format == "ndjson":
+            if cursor:
+                # Errors can't be reported once the stream has started; check it now
+                decode_cursor(cursor)
+        else:
+            files, next_cursor = await data_service.get_data_sources_for_company(
+                company_uid, session, cursor, limit, status=file_status, file_type=file_type
+            )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if format == "ndjson":
+        async def lines():
+            async for batch in data_service.stream_data_sources_for_company(
+                company_uid, cursor, status=file_status, file_type=file_type
+            ):
+                for file_read in await _with_signed_urls(batch):
+                    yield file_read.model_dump_json() + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return await _with_signed_urls(files)
 
 from app.data.schemas import TrainingDataSourceUpdate
 
@@ -180,3 +254,37 @@ async def delete_file(
         raise HTTPException(status_code=404, detail="File not found")
 
     return {"detail": "File deleted"}
+
+
+@router.post("/reindex/{company_uid}", status_code=status.HTTP_202_ACCEPTED, dependencies=[admin_checker])
+async def reindex_company(
+    company_uid: str,
+    background_tasks: BackgroundTasks,
+    model_name: Optional[str] = None,
+    collection_name: Optional[str] = None
+):
+    """
+    Rebuild the company's vector collection from the stored chunks, in the
+    background. Pass `collection_name` to build a side collection (e.g. with
+    another `model_name`) without touching the live one.
+    """
+    if collection_name and collection_name.startswith(COMPANY_COLLECTION_PREFIX):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Side collection names can't start with '{COMPANY_COLLECTION_PREFIX}'"
+        )
+
+    if not claim_reindex(company_uid):
+        raise HTTPException(status_code=409, detail="A reindex of this company is already running")
+
+    background_tasks.add_task(
+        run_reindex_job,
+        company_uid,
+        model_name=model_name or Config.EMBEDDING_MODEL_NAME,
+        collection_name=collection_name
+    )
+    return {
+        "company_uid": company_uid,
+        "collection_name": collection_name or collection_name_for(company_uid),
+        "status": "queued"
+    }
@@ -1,9 +1,11 @@
 # app/data/schemas.py
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import uuid
 
+from app.core.config import Config
+
 
 class TrainingDataSourceCreate(BaseModel):
     name: str
@@ -11,6 +13,7 @@ class TrainingDataSourceCreate(BaseModel):
     file_path: str
     company_uid: uuid.UUID
     status: str = "uploaded"
+    content_hash: Optional[str] = None
 
 
 
@@ -22,12 +25,45 @@ class TrainingDataSourceRead(BaseModel):
     user_uid: Optional[uuid.UUID]
     company_uid: Optional[uuid.UUID]
     status: str
+    progress: int = 0
+    error: Optional[str] = None
+    signed_url: Optional[str] = None  # filled in by listings
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+
+class TrainingDataSourceStatus(BaseModel):
+    uid: uuid.UUID
+    status: str
+    progress: int = 0
+    error: Optional[str] = None
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class TrainingDataSourceUpdate(BaseModel):
     name: Optional[str] = None
-    status: Optional[str] = None
\ No newline at end of file
+    status: Optional[str] = None
+
+
+class SearchQuery(BaseModel):
+    queries: List[str] = Field(min_length=1, max_length=Config.SEARCH_MAX_QUERIES)
+    limit: int = Field(default=5, ge=1, le=Config.SEARCH_MAX_LIMIT)
+    source_uids: Optional[List[uuid.UUID]] = None  # only search these files
+
+
+class SearchHit(BaseModel):
+    source_uid: uuid.UUID
+    chunk_index: int
+    page_number: Optional[int] = None
+    text: str
+    score: float
+
+
+class SearchResult(BaseModel):
+    query: str
+    hits: List[SearchHit]
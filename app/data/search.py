@@ -0,0 +1,42 @@
+# app/data/search.py
+from typing import Hashable, Optional
+import threading
+
+from app.core.cache import LRUCache
+from app.core.config import Config
+
+
+class SearchResultCache:
+    """
+    TTL cache of search hits per (company, query, parameters).
+
+    Every key includes the company's generation counter; ingesting or
+    deleting a file bumps it, so stale entries stop matching at once and age
+    out of the LRU on their own. The counters are per process; on other
+    workers the TTL bounds how stale results can get.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 60):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, company_uid: str, key: Hashable) -> tuple:
+        company_uid = str(company_uid)
+        with self._lock:
+            generation = self._generations.get(company_uid, 0)
+        return company_uid, generation, key
+
+    def get(self, company_uid: str, key: Hashable) -> Optional[list]:
+        return self._cache.get(self._key(company_uid, key))
+
+    def set(self, company_uid: str, key: Hashable, hits: list) -> None:
+        self._cache.set(self._key(company_uid, key), hits)
+
+    def invalidate(self, company_uid: str) -> None:
+        company_uid = str(company_uid)
+        with self._lock:
+            self._generations[company_uid] = self._generations.get(company_uid, 0) + 1
+
+
+search_cache = SearchResultCache(maxsize=Config.SEARCH_CACHE_SIZE, ttl=Config.SEARCH_CACHE_TTL)
@@ -2,24 +2,72 @@
 # app/data/service.py
 
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
+from sqlmodel import select, delete, update, insert
 from app.data.models import TrainingDataSource, TrainingDataChunk
 from app.data.schemas import TrainingDataSourceCreate, TrainingDataSourceUpdate
-from typing import Optional
-from datetime import datetime
+from typing import AsyncIterator, Iterator, Optional
+from datetime import datetime, timedelta
 from app.companies.service import CompanyService
 from app.auth.service import UserService
 from fastapi.exceptions import HTTPException
 from fastapi import HTTPException, status
 
 from app.core.config import Config
+from app.core.pagination import DEFAULT_PAGE_SIZE, keyset_after, keyset_page, split_page
+from app.db.database import async_session
 from app.vectorstore.qdrant_client import get_client
-from sentence_transformers import SentenceTransformer
+from app.db.storage import signed_urls
+from app.data.embeddings import (
+    EMBEDDING_DTYPE,
+    embedding_executor,
+    embedding_registry,
+    pack_embedding,
+    unpack_embedding,
+)
+from app.data.search import search_cache
+from app.data.vectors import (
+    chunk_point,
+    collection_exists,
+    collection_name_for,
+    collection_vector_size,
+    delete_points,
+    delete_source_points,
+    drop_collection,
+    ensure_collection,
+    point_id,
+    scroll_points,
+    sources_filter,
+)
+from qdrant_client.models import SearchRequest
+from app.data.chunking import get_chunker
+from app.data.utils import CHUNK_BATCH_SIZE, IngestionStats, Piece, content_hash, next_batch
+from dataclasses import dataclass
+import asyncio
+import logging
+import time
 import uuid
 
+import numpy as np
+
 company_service = CompanyService()
 user_service = UserService()
 
+CHUNK_COLUMNS = (
+    "uid", "source_uid", "content", "content_hash", "embedding", "embedding_model", "token_count", "chunk_index",
+    "page_number", "created_at"
+)
+
+
+# asyncpg's limit on bind parameters in one statement
+MAX_INSERT_PARAMETERS = 32767
+
+
+@dataclass
+class ChunkInsertResult:
+    rows: int = 0
+    statements: int = 0
+    seconds: float = 0.0
+
 
 class TrainingDataService:
 
@@ -27,12 +75,12 @@ class TrainingDataService:
         self, user_email: str, company_uid: str, data: TrainingDataSourceCreate, session: AsyncSession
     ) -> TrainingDataSource:
         try:
-            company = await company_service.get_company(company_uid, session)
             user = await user_service.get_user_by_email(user_email, session)
             new_data = TrainingDataSource(**data.model_dump())
 
-            new_data.user = user
-            new_data.company = company
+            # Foreign keys, not relationships: assigning those would have to
+            # load the other side's (lazy='raise') collections
+            new_data.user_uid = user.uid if user else None
 
             session.add(new_data)
             await session.commit()
@@ -41,15 +89,64 @@ class TrainingDataService:
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+    async def get_data_source(
+        self, file_uid: str, session: AsyncSession
+    ) -> Optional[TrainingDataSource]:
+        statement = select(TrainingDataSource).where(TrainingDataSource.uid == file_uid)
+        result = await session.exec(statement)
+        return result.first()
+
+    @staticmethod
+    def _company_sources(company_uid: str, status: Optional[str] = None, file_type: Optional[str] = None):
+        statement = select(TrainingDataSource).where(TrainingDataSource.company_uid == company_uid)
+        if status:
+            statement = statement.where(TrainingDataSource.status == status)
+        if file_type:
+            statement = statement.where(TrainingDataSource.type == file_type)
+        return statement
+
     async def get_data_sources_for_company(
-        self, company_uid: str, session: AsyncSession
-    ) -> list[TrainingDataSource]:
-        statement = select(TrainingDataSource).where(
-            TrainingDataSource.company_uid == company_uid
-        ).order_by(TrainingDataSource.created_at.desc())
+        self,
+        company_uid: str,
+        session: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        status: Optional[str] = None,
+        file_type: Optional[str] = None
+    ) -> tuple[list[TrainingDataSource], Optional[str]]:
+        """One page of the company's files, newest first, and the cursor of the next page."""
+        statement = keyset_page(
+            self._company_sources(company_uid, status, file_type),
+            TrainingDataSource.created_at, TrainingDataSource.uid, cursor, limit
+        )
 
         results = await session.exec(statement)
-        return results.all()
+        return split_page(results.all(), limit)
+
+    async def stream_data_sources_for_company(
+        self,
+        company_uid: str,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        file_type: Optional[str] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[list[TrainingDataSource]]:
+        """
+        Every matching file after `cursor`, newest first, in lists of up to
+        `batch_size` fetched from a server-side cursor. Uses its own session
+        so it can outlive the request's; yielded objects are detached.
+        """
+        statement = keyset_after(
+            self._company_sources(company_uid, status, file_type),
+            TrainingDataSource.created_at, TrainingDataSource.uid, cursor
+        ).order_by(TrainingDataSource.created_at.desc(), TrainingDataSource.uid.desc())
+
+        async with async_session() as session:
+            result = await session.stream(statement.execution_options(yield_per=batch_size))
+            async for rows in result.scalars().partitions(batch_size):
+                # Don't keep every row streamed so far in the identity map
+                session.expunge_all()
+                yield rows
 
     async def update_data_source(
         self, file_uid: str, update_data: TrainingDataSourceUpdate, session: AsyncSession
@@ -77,50 +174,505 @@ class TrainingDataService:
         if not file_obj:
             return False
 
+        await session.execute(
+            delete(TrainingDataChunk).where(TrainingDataChunk.source_uid == file_obj.uid)
+        )
         await session.delete(file_obj)
         await session.commit()
+        search_cache.invalidate(file_obj.company_uid)
+
+        if file_obj.file_path:
+            signed_urls.invalidate(file_obj.file_path)
+
+        # Drop only this file's vectors; the rest of the company collection stays
+        await asyncio.to_thread(
+            delete_source_points,
+            get_client(),
+            collection_name_for(file_obj.company_uid),
+            file_obj.uid,
+        )
         return True
 
+    async def find_source_by_hash(
+        self, company_uid: str, content_hash: str, session: AsyncSession
+    ) -> Optional[TrainingDataSource]:
+        """
+        An earlier upload of the same file for this company that finished
+        ingesting. One still "queued" or "processing" may yet fail or be
+        orphaned, so it doesn't count.
+        """
+        statement = select(TrainingDataSource).where(
+            TrainingDataSource.company_uid == company_uid,
+            TrainingDataSource.content_hash == content_hash,
+            TrainingDataSource.status == "processed"
+        ).order_by(TrainingDataSource.created_at).limit(1)
+
+        result = await session.exec(statement)
+        return result.first()
+
+    async def get_cached_embeddings(
+        self, model_name: str, hashes: list[str], session: AsyncSession
+    ) -> dict[str, np.ndarray]:
+        """
+        Embeddings already stored for these chunk hashes by `model_name`, from
+        any chunk row. The vector only depends on (model, text), so any copy
+        will do.
+        """
+        if not hashes:
+            return {}
+
+        statement = (
+            select(TrainingDataChunk.content_hash, TrainingDataChunk.embedding)
+            .where(
+                TrainingDataChunk.embedding_model == model_name,
+                TrainingDataChunk.content_hash.in_(set(hashes)),
+                TrainingDataChunk.embedding.is_not(None)
+            )
+            .distinct(TrainingDataChunk.content_hash)
+        )
+        result = await session.exec(statement)
+        return {chunk_hash: unpack_embedding(embedding) for chunk_hash, embedding in result.all()}
+
+    async def embed_chunks(
+        self,
+        texts: list[str],
+        hashes: list[str],
+        session: AsyncSession,
+        model_name: str = Config.EMBEDDING_MODEL_NAME,
+        known: Optional[dict[str, np.ndarray]] = None
+    ) -> np.ndarray:
+        """
+        One float32 embedding row per text. Vectors come from `known`, then from the
+        embedding cache (stored chunks), and only the remaining distinct texts
+        are encoded.
+        """
+        vectors = dict(known or {})
+        vectors.update(await self.get_cached_embeddings(
+            model_name, [chunk_hash for chunk_hash in set(hashes) if chunk_hash not in vectors], session
+        ))
+
+        missing: dict[str, str] = {}
+        for text, chunk_hash in zip(texts, hashes):
+            if chunk_hash not in vectors:
+                missing.setdefault(chunk_hash, text)
+
+        if missing:
+            # Off the event loop, batched with other uploads
+            encoded = await embedding_executor.encode(list(missing.values()), model_name)
+            vectors.update(zip(missing.keys(), encoded))
+
+        logging.info(f"Encoded {len(missing)} of {len(texts)} chunks with {model_name}, rest from cache")
+        if not hashes:
+            return np.empty((0, 0), dtype=EMBEDDING_DTYPE)
+        return np.stack([vectors[chunk_hash] for chunk_hash in hashes]).astype(EMBEDDING_DTYPE, copy=False)
+
+    async def set_status(
+        self, source_uid: uuid.UUID, new_status: str, session: AsyncSession, error: Optional[str] = None
+    ) -> None:
+        await session.execute(
+            update(TrainingDataSource)
+            .where(TrainingDataSource.uid == source_uid)
+            .values(status=new_status, error=error, updated_at=datetime.utcnow())
+        )
+        await session.commit()
+
+    async def fail_stale_sources(
+        self, session: AsyncSession, stale_after: float, error: str
+    ) -> list[tuple[uuid.UUID, uuid.UUID]]:
+        """Fail sources stuck in "processing" without progress for `stale_after` seconds; returns (uid, company_uid)."""
+        result = await session.execute(
+            update(TrainingDataSource)
+            .where(
+                TrainingDataSource.status == "processing",
+                TrainingDataSource.updated_at < datetime.utcnow() - timedelta(seconds=stale_after)
+            )
+            .values(status="failed", error=error, updated_at=datetime.utcnow())
+            .returning(TrainingDataSource.uid, TrainingDataSource.company_uid)
+        )
+        stale = [tuple(row) for row in result.all()]
+        await session.commit()
+        return stale
+
+    async def discard_chunks(self, source_uid: uuid.UUID, company_uid: str, session: AsyncSession) -> None:
+        """Remove whatever a failed ingestion managed to store."""
+        await session.execute(
+            delete(TrainingDataChunk).where(TrainingDataChunk.source_uid == source_uid)
+        )
+        await session.commit()
+        await asyncio.to_thread(
+            delete_source_points, get_client(), collection_name_for(company_uid), source_uid
+        )
+        search_cache.invalidate(company_uid)
+
+    async def bulk_insert_chunks(
+        self,
+        rows: list[dict],
+        session: AsyncSession,
+        batch_size: int = Config.CHUNK_INSERT_BATCH_SIZE,
+        mode: str = Config.CHUNK_INSERT_MODE
+    ) -> ChunkInsertResult:
+        """
+        Write chunk rows without building ORM objects: one multi-row INSERT (or
+        one COPY) per `batch_size` rows. Rows must carry every column in
+        CHUNK_COLUMNS. Runs in the session's transaction; the caller commits.
+
+        Ingestion calls this once per embed batch, so there `batch_size` only
+        matters if it is below CHUNK_BATCH_SIZE.
+        """
+        result = ChunkInsertResult()
+        if mode != "copy":
+            # Every row binds one parameter per column
+            batch_size = min(batch_size, MAX_INSERT_PARAMETERS // len(CHUNK_COLUMNS))
+        started = time.perf_counter()
+
+        if mode == "copy":
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            asyncpg_connection = raw_connection.driver_connection
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+
+            if mode == "copy":
+                await asyncpg_connection.copy_records_to_table(
+                    TrainingDataChunk.__tablename__,
+                    records=[tuple(row[column] for column in CHUNK_COLUMNS) for row in batch],
+                    columns=CHUNK_COLUMNS,
+                )
+            else:
+                await session.execute(insert(TrainingDataChunk).values(batch))
+
+            result.rows += len(batch)
+            result.statements += 1
+
+        result.seconds = time.perf_counter() - started
+        return result
+
+    async def ingest_text_stream(
+        self,
+        source_uid: uuid.UUID,
+        company_uid: str,
+        pieces: Iterator[Piece],
+        session: AsyncSession,
+        stats: Optional[IngestionStats] = None,
+        batch_size: int = CHUNK_BATCH_SIZE,
+        model_name: str = Config.EMBEDDING_MODEL_NAME
+    ) -> IngestionStats:
+        """
+        Chunk, store and embed a document batch by batch, so memory depends on
+        `batch_size` and not on the size of the document.
+        """
+        stats = stats or IngestionStats()
+        # Building the chunker may load the model; keep that off the event loop
+        chunker = await asyncio.to_thread(get_chunker, model_name)
+        chunks = chunker.chunks(pieces)
+        chunk_index = 0
+
+        while True:
+            # Extraction and chunking are CPU/IO bound; keep them off the event loop
+            batch = await asyncio.to_thread(next_batch, chunks, batch_size)
+            if not batch:
+                break
+            stats.record_batch(batch)
+
+            texts = [chunk.text for chunk in batch]
+            hashes = [content_hash(text) for text in texts]
+            embeddings = await self.embed_chunks(texts, hashes, session, model_name)
+
+            created_at = datetime.utcnow()
+            inserted = await self.bulk_insert_chunks([
+                {
+                    "uid": uuid.uuid4(),
+                    "source_uid": source_uid,
+                    "content": chunk.text,
+                    "content_hash": chunk_hash,
+                    "embedding": pack_embedding(embedding),
+                    "embedding_model": model_name,
+                    "token_count": chunk.token_count,
+                    "chunk_index": chunk_index + offset,
+                    "page_number": chunk.page_number,
+                    "created_at": created_at,
+                }
+                for offset, (chunk, chunk_hash, embedding) in enumerate(zip(batch, hashes, embeddings))
+            ], session)
+            stats.insert_seconds += inserted.seconds
+
+            await self.process_chunks_for_vector_search(
+                source_uid=source_uid,
+                chunks=texts,
+                company_uid=company_uid,
+                model_name=model_name,
+                start_index=chunk_index,
+                page_numbers=[chunk.page_number for chunk in batch],
+                embeddings=embeddings
+            )
+            chunk_index += len(batch)
+
+            # Commit per batch so pollers can see progress
+            await session.execute(
+                update(TrainingDataSource)
+                .where(TrainingDataSource.uid == source_uid)
+                .values(progress=chunk_index, updated_at=datetime.utcnow())
+            )
+            await session.commit()
+            search_cache.invalidate(company_uid)
+
+        return stats
+
     # ✅ NEW METHOD: Embeds and uploads chunks to Qdrant
     async def process_chunks_for_vector_search(
         self,
         source_uid: str,
         chunks: list[str],
         company_uid: str,
-        model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+        model_name: str = Config.EMBEDDING_MODEL_NAME,
+        start_index: int = 0,
+        page_numbers: Optional[list[Optional[int]]] = None,
+        embeddings: Optional[np.ndarray] = None
     ):
+        """Upsert `chunks` as points of the company collection, encoding them unless `embeddings` is given."""
         qdrant = get_client()
-        collection_name = f"company_{company_uid}"
-
-        # 1. Ensure collection exists (or recreate it)
-        qdrant.recreate_collection(
-            collection_name=collection_name,
-            vectors_config={
-                "size": 384,
-                "distance": "Cosine"
-            }
-        )
+        collection_name = collection_name_for(company_uid)
+
+        # 1. Get the shared sentence-transformer model's dimension; the model is
+        #    loaded once per process, but may have been evicted, so off the event loop
+        dimension = await asyncio.to_thread(embedding_registry.dimension, model_name)
 
-        # 2. Load the sentence-transformer model
-        embedder = SentenceTransformer(model_name)
+        # 2. Ensure collection exists (checked once per process)
+        await asyncio.to_thread(ensure_collection, qdrant, collection_name, dimension)
 
-        # 3. Generate embeddings
-        embeddings = embedder.encode(chunks).tolist()
+        # 3. Generate embeddings (off the event loop, batched with other uploads)
+        if embeddings is None:
+            embeddings = await embedding_executor.encode(chunks, model_name)
+        # The Qdrant client wants plain lists; convert the whole matrix in one go
+        vectors = np.asarray(embeddings, dtype=EMBEDDING_DTYPE).tolist()
 
         # 4. Prepare Qdrant points
-        points = []
-        for idx, (text, vector) in enumerate(zip(chunks, embeddings)):
-            points.append({
-                "id": str(uuid.uuid4()),
-                "vector": vector,
-                "payload": {
-                    "text": text,
-                    "chunk_index": idx,
-                    "source_uid": source_uid,
-                    "company_uid": company_uid,
-                }
-            })
+        page_numbers = page_numbers or [None] * len(chunks)
+        points = [
+            chunk_point(source_uid, company_uid, idx, text, vector, page_number)
+            for idx, (text, vector, page_number) in enumerate(zip(chunks, vectors, page_numbers), start=start_index)
+        ]
 
         # 5. Upsert to Qdrant
-        qdrant.upsert(collection_name=collection_name, points=points)
-        print(f"✅ Embedded {len(points)} chunks for {collection_name}")
+        await asyncio.to_thread(qdrant.upsert, collection_name=collection_name, points=points)
+        logging.info(f"Embedded {len(points)} chunks for {collection_name}")
+
+    async def reindex_company(
+        self,
+        company_uid: str,
+        session: AsyncSession,
+        model_name: str = Config.EMBEDDING_MODEL_NAME,
+        collection_name: Optional[str] = None,
+        batch_size: int = Config.CHUNK_INSERT_BATCH_SIZE
+    ) -> int:
+        """
+        Rebuild a company's Qdrant collection from the chunks in Postgres.
+
+        Points are upserted in place, so searches keep answering during the
+        rebuild, and points left without a chunk are deleted at the end.
+        Sources still being ingested are included; their jobs write their own
+        points as well. The live collection can only be rebuilt with a model
+        of the same vector size.
+
+        Stored embeddings of `model_name` are used as they are and others come
+        from the embedding cache, so only texts never embedded with that model
+        hit the encoder. Newly computed embeddings are written back to the
+        chunks. With `collection_name` the points go to a separate collection
+        and the chunks are left untouched, e.g. to try out another model.
+        Returns the number of points written.
+        """
+        qdrant = get_client()
+        target = collection_name or collection_name_for(company_uid)
+        persist = collection_name is None
+
+        dimension = await asyncio.to_thread(embedding_registry.dimension, model_name)
+        current = await asyncio.to_thread(collection_vector_size, qdrant, target)
+        if current is not None and current != dimension:
+            if persist:
+                raise ValueError(
+                    f"{target} holds {current}-dimensional vectors but {model_name} makes {dimension}; "
+                    f"build a side collection instead"
+                )
+            # Side collections aren't searched; start them over
+            await asyncio.to_thread(drop_collection, qdrant, target)
+        await asyncio.to_thread(ensure_collection, qdrant, target, dimension)
+
+        written = 0
+        last_uid = None
+        while True:
+            # Keyset pagination over the chunk primary key
+            statement = (
+                select(TrainingDataChunk)
+                .join(TrainingDataSource, TrainingDataSource.uid == TrainingDataChunk.source_uid)
+                .where(TrainingDataSource.company_uid == company_uid, TrainingDataSource.status != "failed")
+                .order_by(TrainingDataChunk.uid)
+                .limit(batch_size)
+            )
+            if last_uid is not None:
+                statement = statement.where(TrainingDataChunk.uid > last_uid)
+
+            rows = (await session.exec(statement)).all()
+            if not rows:
+                break
+            last_uid = rows[-1].uid
+
+            hashes = [row.content_hash or content_hash(row.content) for row in rows]
+            stored = {
+                chunk_hash: unpack_embedding(row.embedding)
+                for row, chunk_hash in zip(rows, hashes)
+                if row.embedding_model == model_name and row.embedding is not None
+            }
+            embeddings = await self.embed_chunks(
+                [row.content for row in rows], hashes, session, model_name, known=stored
+            )
+
+            points = [
+                chunk_point(row.source_uid, company_uid, row.chunk_index, row.content, vector, row.page_number)
+                for row, vector in zip(rows, embeddings.tolist())
+            ]
+            await asyncio.to_thread(qdrant.upsert, collection_name=target, points=points)
+            written += len(points)
+
+            if persist:
+                stale = [
+                    {
+                        "uid": row.uid,
+                        "content_hash": chunk_hash,
+                        "embedding": pack_embedding(vector),
+                        "embedding_model": model_name
+                    }
+                    for row, chunk_hash, vector in zip(rows, hashes, embeddings)
+                    if row.embedding_model != model_name or row.embedding is None
+                ]
+                if stale:
+                    await session.execute(update(TrainingDataChunk), stale)
+                    await session.commit()
+
+            # Don't keep every chunk of the company in the identity map
+            session.expunge_all()
+
+        deleted = await self._delete_orphan_points(qdrant, target, company_uid, session, batch_size)
+
+        if persist:
+            search_cache.invalidate(company_uid)
+        logging.info(
+            f"Reindexed {written} chunks of company {company_uid} into {target} with {model_name}, "
+            f"deleted {deleted} orphaned points"
+        )
+        return written
+
+    async def _delete_orphan_points(
+        self, qdrant, collection_name: str, company_uid: str, session: AsyncSession, batch_size: int
+    ) -> int:
+        """
+        Delete points with no chunk behind them, e.g. of deleted sources. Points
+        of sources still processing are kept: their job upserts points before
+        it commits the chunks.
+        """
+        deleted = 0
+        offset = None
+        while True:
+            points, offset = await asyncio.to_thread(scroll_points, qdrant, collection_name, batch_size, offset)
+            if not points:
+                return deleted
+            source_uids = {
+                uuid.UUID(point.payload["source_uid"]) for point in points if point.payload.get("source_uid")
+            }
+
+            # Read after the scroll, so a job that finished meanwhile has its chunks committed
+            sources = await session.exec(
+                select(TrainingDataSource.uid, TrainingDataSource.status).where(
+                    TrainingDataSource.company_uid == company_uid,
+                    TrainingDataSource.uid.in_(source_uids)
+                )
+            )
+            processing = {str(uid) for uid, source_status in sources.all() if source_status == "processing"}
+            chunks = await session.exec(
+                select(TrainingDataChunk.source_uid, TrainingDataChunk.chunk_index)
+                .join(TrainingDataSource, TrainingDataSource.uid == TrainingDataChunk.source_uid)
+                .where(TrainingDataSource.uid.in_(source_uids), TrainingDataSource.status != "failed")
+            )
+            valid = {point_id(source_uid, chunk_index) for source_uid, chunk_index in chunks.all()}
+
+            orphans = [
+                point.id for point in points
+                if point.payload.get("source_uid")
+                and str(point.id) not in valid
+                and point.payload["source_uid"] not in processing
+            ]
+            if orphans:
+                await asyncio.to_thread(delete_points, qdrant, collection_name, orphans)
+                deleted += len(orphans)
+
+            if offset is None:
+                return deleted
+
+    async def search(
+        self,
+        company_uid: str,
+        queries: list[str],
+        limit: int = 5,
+        source_uids: Optional[list[uuid.UUID]] = None,
+        model_name: str = Config.EMBEDDING_MODEL_NAME
+    ) -> list[list[dict]]:
+        """
+        Top `limit` chunks of the company for each query, optionally only from
+        `source_uids`. Cached queries are answered from memory; the rest are
+        embedded in one encode call and sent to Qdrant in one batch request.
+        """
+        sources_key = tuple(sorted(str(uid) for uid in source_uids)) if source_uids else None
+        results: list[Optional[list[dict]]] = [None] * len(queries)
+        missing: dict[str, list[int]] = {}
+
+        for position, query in enumerate(queries):
+            hits = search_cache.get(company_uid, (model_name, query, limit, sources_key))
+            if hits is None:
+                missing.setdefault(query, []).append(position)
+            else:
+                results[position] = hits
+
+        if not missing:
+            return results
+
+        qdrant = get_client()
+        collection_name = collection_name_for(company_uid)
+        texts = list(missing)
+
+        if not await asyncio.to_thread(collection_exists, qdrant, collection_name):
+            # Nothing ingested yet
+            found = [[] for _ in texts]
+        else:
+            vectors = np.asarray(
+                await embedding_executor.encode(texts, model_name), dtype=EMBEDDING_DTYPE
+            ).tolist()
+            query_filter = sources_filter(source_uids) if source_uids else None
+
+            responses = await asyncio.to_thread(
+                qdrant.search_batch,
+                collection_name=collection_name,
+                requests=[
+                    SearchRequest(vector=vector, filter=query_filter, limit=limit, with_payload=True)
+                    for vector in vectors
+                ]
+            )
+            found = [
+                [
+                    {
+                        "source_uid": point.payload["source_uid"],
+                        "chunk_index": point.payload["chunk_index"],
+                        "page_number": point.payload.get("page_number"),
+                        "text": point.payload["text"],
+                        "score": point.score,
+                    }
+                    for point in points
+                ]
+                for points in responses
+            ]
+
+        for query, hits in zip(texts, found):
+            search_cache.set(company_uid, (model_name, query, limit, sources_key), hits)
+            for position in missing[query]:
+                results[position] = hits
+
+        return results
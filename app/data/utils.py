@@ -0,0 +1,186 @@
+# app/data/utils.py
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from fastapi import UploadFile
+from itertools import islice
+from typing import Iterator, Optional
+import hashlib
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import docx
+import fitz  # PyMuPDF
+
+from app.core.config import Config
+from pdf_worker import extract_pdf_range
+
+UPLOAD_READ_SIZE = 1024 * 1024  # 1 MiB
+CHUNK_BATCH_SIZE = 64
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# (page_number, text); page_number is None for formats without pages
+Piece = tuple[Optional[int], str]
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class IngestionStats:
+    bytes_read: int = 0
+    chunks: int = 0
+    batches: int = 0
+    # Largest amount of chunk text held in memory at once by the pipeline
+    peak_batch_bytes: int = 0
+    insert_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def record_batch(self, batch: list) -> None:
+        self.batches += 1
+        self.chunks += len(batch)
+        self.peak_batch_bytes = max(self.peak_batch_bytes, sum(len(chunk.text) for chunk in batch))
+
+    def as_dict(self) -> dict:
+        return {
+            "bytes_read": self.bytes_read,
+            "chunks": self.chunks,
+            "batches": self.batches,
+            "peak_batch_bytes": self.peak_batch_bytes,
+            "insert_seconds": round(self.insert_seconds, 3),
+            # Process-wide high-water mark (KiB on Linux), for spotting regressions
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "seconds": round(time.perf_counter() - self.started_at, 3),
+        }
+
+
+def is_supported_type(content_type: str | None) -> bool:
+    if not content_type:
+        return False
+    return content_type in (PDF_TYPE, DOCX_TYPE) or content_type.startswith("text/")
+
+
+async def spool_upload(file: UploadFile) -> tuple[str, int, str]:
+    """
+    Copy an upload to a temp file in fixed-size reads, hashing it on the way;
+    returns (path, size, sha256 hex digest).
+    """
+    suffix = os.path.splitext(file.filename or "")[1]
+    size = 0
+    digest = hashlib.sha256()
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        while True:
+            data = await file.read(UPLOAD_READ_SIZE)
+            if not data:
+                break
+            tmp.write(data)
+            digest.update(data)
+            size += len(data)
+
+    return tmp.name, size, digest.hexdigest()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_executor
+    if _pdf_executor is None:
+        # spawn, not fork: the parent runs threads (embedding, bcrypt) that fork can deadlock.
+        # Workers only import pdf_worker, which lives outside the app package.
+        _pdf_executor = ProcessPoolExecutor(
+            max_workers=Config.PDF_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_executor
+
+
+def shutdown_pdf_pool() -> None:
+    global _pdf_executor
+    if _pdf_executor is not None:
+        _pdf_executor.shutdown(wait=False, cancel_futures=True)
+        _pdf_executor = None
+
+
+def _iter_pdf_pages_parallel(path: str, page_count: int) -> Iterator[Piece]:
+    """
+    Split the document into page ranges extracted by the process pool and
+    yield the pages in order. Only a few ranges are in flight at a time so a
+    slow consumer doesn't make the whole document pile up in memory.
+    """
+    pool = _pdf_pool()
+    step = Config.PDF_PAGES_PER_TASK
+    ranges = deque((start, min(start + step, page_count)) for start in range(0, page_count, step))
+    in_flight = deque()
+    max_in_flight = Config.PDF_EXTRACT_WORKERS * 2
+
+    try:
+        while ranges or in_flight:
+            while ranges and len(in_flight) < max_in_flight:
+                start, stop = ranges.popleft()
+                in_flight.append((start, pool.submit(extract_pdf_range, path, start, stop)))
+
+            start, future = in_flight.popleft()
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, text
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+def iter_pdf_pages(path: str) -> Iterator[Piece]:
+    doc = fitz.open(path)
+
+    if Config.PDF_EXTRACT_WORKERS > 0 and doc.page_count >= Config.PDF_PARALLEL_MIN_PAGES:
+        page_count = doc.page_count
+        doc.close()
+        return _iter_pdf_pages_parallel(path, page_count)
+
+    def pages():
+        with doc:
+            for number, page in enumerate(doc, start=1):
+                yield number, page.get_text()
+
+    return pages()
+
+
+def iter_docx_paragraphs(path: str) -> Iterator[Piece]:
+    doc = docx.Document(path)
+    return ((None, para.text + "\n") for para in doc.paragraphs)
+
+
+def iter_text_lines(path: str) -> Iterator[Piece]:
+    f = open(path, encoding="utf-8", errors="ignore")
+
+    def lines():
+        with f:
+            for line in f:
+                yield None, line
+
+    return lines()
+
+
+def extract_text_stream(path: str, content_type: str) -> Iterator[Piece]:
+    """
+    Open the document eagerly (so broken files fail here) and return an
+    iterator of (page_number, text) pieces: pages, paragraphs or lines.
+    Only PDFs have page numbers; other types yield None.
+    """
+    if content_type == PDF_TYPE:
+        return iter_pdf_pages(path)
+    elif content_type == DOCX_TYPE:
+        return iter_docx_paragraphs(path)
+    elif content_type.startswith("text/"):
+        return iter_text_lines(path)
+    else:
+        raise ValueError(f"Unsupported file type: {content_type}")
+
+
+def next_batch(iterator: Iterator, size: int) -> list:
+    return list(islice(iterator, size))
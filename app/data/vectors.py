@@ -0,0 +1,131 @@
+# app/data/vectors.py
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    FilterSelector,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    PointIdsList,
+    VectorParams,
+)
+from typing import Optional
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Namespace for deterministic point ids; never change it or re-uploads stop
+# overwriting the points they replace.
+POINT_ID_NAMESPACE = uuid.UUID("6f1c8e52-3c4b-4d8e-9a57-2f0b9f3d4a10")
+
+# Collections this process has already created or seen, so uploads skip the
+# existence round-trip to Qdrant.
+_known_collections: set[str] = set()
+
+
+# Live per-company collections; side collections must not use this prefix
+COMPANY_COLLECTION_PREFIX = "company_"
+
+
+def collection_name_for(company_uid) -> str:
+    return f"{COMPANY_COLLECTION_PREFIX}{company_uid}"
+
+
+def point_id(source_uid, chunk_index: int) -> str:
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source_uid}:{chunk_index}"))
+
+
+def chunk_point(
+    source_uid, company_uid, chunk_index: int, text: str, vector: list[float], page_number: Optional[int] = None
+) -> dict:
+    # Ids are derived from (source, chunk) so re-processing a file
+    # overwrites its points instead of duplicating them
+    return {
+        "id": point_id(source_uid, chunk_index),
+        "vector": vector,
+        "payload": {
+            "text": text,
+            "chunk_index": chunk_index,
+            "page_number": page_number,
+            "source_uid": str(source_uid),
+            "company_uid": str(company_uid),
+        }
+    }
+
+
+def source_filter(source_uid) -> Filter:
+    return Filter(must=[FieldCondition(key="source_uid", match=MatchValue(value=str(source_uid)))])
+
+
+def sources_filter(source_uids) -> Filter:
+    return Filter(must=[FieldCondition(key="source_uid", match=MatchAny(any=[str(uid) for uid in source_uids]))])
+
+
+def ensure_collection(qdrant, collection_name: str, vector_size: int) -> None:
+    if collection_name in _known_collections:
+        return
+
+    if not qdrant.collection_exists(collection_name):
+        try:
+            qdrant.create_collection(
+                collection_name=collection_name,
+                vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+            )
+            logger.info(f"Created Qdrant collection {collection_name}")
+        except Exception:
+            # Another worker may have created it in the meantime
+            if not qdrant.collection_exists(collection_name):
+                raise
+
+    # Idempotent; lets deletes and searches filter on source_uid cheaply
+    qdrant.create_payload_index(
+        collection_name=collection_name,
+        field_name="source_uid",
+        field_schema=PayloadSchemaType.KEYWORD,
+    )
+    _known_collections.add(collection_name)
+
+
+def collection_exists(qdrant, collection_name: str) -> bool:
+    return collection_name in _known_collections or qdrant.collection_exists(collection_name)
+
+
+def collection_vector_size(qdrant, collection_name: str) -> Optional[int]:
+    """Vector size of an existing collection, or None if there is none."""
+    if not collection_exists(qdrant, collection_name):
+        return None
+    return qdrant.get_collection(collection_name).config.params.vectors.size
+
+
+def drop_collection(qdrant, collection_name: str) -> None:
+    _known_collections.discard(collection_name)
+    if qdrant.collection_exists(collection_name):
+        qdrant.delete_collection(collection_name)
+        logger.info(f"Dropped Qdrant collection {collection_name}")
+
+
+def delete_source_points(qdrant, collection_name: str, source_uid) -> None:
+    if not collection_exists(qdrant, collection_name):
+        return
+
+    qdrant.delete(
+        collection_name=collection_name,
+        points_selector=FilterSelector(filter=source_filter(source_uid)),
+    )
+
+
+def scroll_points(qdrant, collection_name: str, limit: int, offset=None) -> tuple[list, Optional[str]]:
+    """One page of points (ids and source_uid only) and the offset of the next page."""
+    return qdrant.scroll(
+        collection_name=collection_name,
+        limit=limit,
+        offset=offset,
+        with_payload=["source_uid"],
+        with_vectors=False,
+    )
+
+
+def delete_points(qdrant, collection_name: str, ids: list) -> None:
+    qdrant.delete(collection_name=collection_name, points_selector=PointIdsList(points=ids))
@@ -66,28 +66,73 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 from app.core.config import Config
-from sqlalchemy.pool import NullPool
+from app.core.metrics import register_metrics
+from app.db.instrumentation import instrument_engine, query_histogram
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from uuid import uuid4
-from supabase import create_client
 
 # Async-compatible URL
 DATABASE_URL = Config.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
-print("✅ DATABASE_URL (sanitized):", DATABASE_URL)  
-
 # Optionally: Add query param if connect_args isn't respected
 # DATABASE_URL += "?statement_cache_size=0"
 
+if Config.DB_POOL_MODE == "direct":
+    # Talking straight to Postgres: keep connections open and reuse prepared statements
+    engine_options = {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+        "connect_args": {
+            "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        },
+    }
+else:
+    # PgBouncer in transaction mode: a server connection is not ours between
+    # transactions, so no client-side pool and no named prepared statements
+    engine_options = {
+        "poolclass": NullPool,
+        "connect_args": {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        },
+    }
+
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True,
-    connect_args={
-        "statement_cache_size": 0,
-        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
-    },
-    poolclass=NullPool,
+    echo=Config.DB_ECHO,
+    **engine_options,
 )
 
+if Config.DB_QUERY_METRICS:
+    instrument_engine(
+        engine,
+        slow_query_ms=Config.DB_SLOW_QUERY_MS,
+        sample_rate=Config.DB_QUERY_LOG_SAMPLE_RATE,
+    )
+
+
+def get_pool_metrics() -> dict:
+    pool = engine.pool
+    metrics = {"mode": Config.DB_POOL_MODE, "pool": pool.__class__.__name__}
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+
+    return metrics
+
+
+register_metrics("db_pool", get_pool_metrics)
+register_metrics("db_queries", query_histogram.snapshot)
+
 async_session = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -99,9 +144,3 @@ async def get_db():
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
-
-
-# Supabase client setup
-SUPABASE_URL = Config.SUPABASE_URL
-SUPABASE_KEY = Config.SUPABASE_KEY
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
@@ -0,0 +1,88 @@
+# app/db/instrumentation.py
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+import bisect
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency buckets; the last bucket is open-ended
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+MAX_LOGGED_STATEMENT = 1000
+
+
+class QueryHistogram:
+    """Per statement kind (SELECT, INSERT, ...) latency histogram."""
+
+    def __init__(self, buckets_ms=BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._lock = threading.Lock()
+        self._series: dict[str, dict] = {}
+
+    def observe(self, kind: str, elapsed_ms: float) -> None:
+        index = bisect.bisect_left(self.buckets_ms, elapsed_ms)
+        with self._lock:
+            series = self._series.get(kind)
+            if series is None:
+                series = self._series[kind] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "buckets": [0] * (len(self.buckets_ms) + 1),
+                }
+            series["count"] += 1
+            series["total_ms"] += elapsed_ms
+            series["buckets"][index] += 1
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in self.buckets_ms] + ["inf"]
+        with self._lock:
+            return {
+                kind: {
+                    "count": series["count"],
+                    "total_ms": round(series["total_ms"], 3),
+                    "buckets": dict(zip(labels, series["buckets"])),
+                }
+                for kind, series in self._series.items()
+            }
+
+
+query_histogram = QueryHistogram()
+
+
+def _statement_kind(statement: str) -> str:
+    parts = statement.lstrip().split(None, 1)
+    return parts[0].upper() if parts else "UNKNOWN"
+
+
+def instrument_engine(engine: AsyncEngine, slow_query_ms: float, sample_rate: float = 0.0) -> None:
+    """
+    Time every statement into `query_histogram`. Statements slower than
+    `slow_query_ms` are logged as warnings, and a `sample_rate` fraction of the
+    rest at INFO. Parameters are never logged.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_started_at"].pop()) * 1000
+        query_histogram.observe(_statement_kind(statement), elapsed_ms)
+
+        if elapsed_ms >= slow_query_ms:
+            logger.warning(f"Slow query ({elapsed_ms:.1f} ms): {statement[:MAX_LOGGED_STATEMENT]}")
+        elif sample_rate and random.random() < sample_rate:
+            logger.info(f"Query ({elapsed_ms:.1f} ms): {statement[:MAX_LOGGED_STATEMENT]}")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute doesn't fire for failed statements; drop their start time
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started_at"):
+            conn.info["query_started_at"].pop()
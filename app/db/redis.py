@@ -1,23 +1,128 @@
 import redis.asyncio as redis
 from app.core.config import Config
+from typing import Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 JTI_EXPIRY = 3600
 
+# Revocations are announced on this channel and also kept in a sorted set
+# (jti -> expiry timestamp) so a freshly started worker can catch up
+REVOCATION_CHANNEL = "token_revocations"
+REVOKED_JTIS_KEY = "revoked_jtis"
+RECONNECT_DELAY = 1  # seconds
+
 token_blocklist = redis.StrictRedis(
     host=Config.REDIS_HOST,
     port=Config.REDIS_PORT,
     db=0
 )
 
+# General-purpose connection for caches and counters; keys are prefixed per use
+redis_client = redis.StrictRedis(
+    host=Config.REDIS_HOST,
+    port=Config.REDIS_PORT,
+    db=0
+)
+
+
+class RevocationCache:
+    """
+    Worker-local copy of the revoked JTIs.
+
+    While subscribed to REVOCATION_CHANNEL the set is complete, so a JTI that
+    is not in it is not revoked and needs no Redis call. While disconnected
+    `ready` is False and callers must ask Redis.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+        self._prune()
+
+    def might_be_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._ready = False
+
+    def _prune(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+    async def _seed(self) -> None:
+        now = time.time()
+        await token_blocklist.zremrangebyscore(REVOKED_JTIS_KEY, "-inf", now)
+        entries = await token_blocklist.zrangebyscore(REVOKED_JTIS_KEY, now, "+inf", withscores=True)
+        for jti, expires_at in entries:
+            self._revoked[jti.decode()] = expires_at
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = token_blocklist.pubsub()
+            try:
+                # Subscribe before seeding so nothing published in between is missed
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                await self._seed()
+                self._ready = True
+
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.add(message["data"].decode(), time.time() + JTI_EXPIRY)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Revocation listener disconnected: {e}")
+            finally:
+                self._ready = False
+                await pubsub.reset()
+
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+revocation_cache = RevocationCache()
+
+
 async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(
-        name=jti,
-        value="",
-        ex=JTI_EXPIRY
-    )
+    expires_at = time.time() + JTI_EXPIRY
+
+    async with token_blocklist.pipeline(transaction=True) as pipe:
+        pipe.set(name=jti, value="", ex=JTI_EXPIRY)
+        pipe.zadd(REVOKED_JTIS_KEY, {jti: expires_at})
+        pipe.zremrangebyscore(REVOKED_JTIS_KEY, "-inf", time.time())
+        pipe.publish(REVOCATION_CHANNEL, jti)
+        await pipe.execute()
+
+    revocation_cache.add(jti, expires_at)
 
 
 async def token_in_blocklist(jti: str) -> bool:
+    # Common case: the local set is in sync and doesn't know this JTI
+    if revocation_cache.ready and not revocation_cache.might_be_revoked(jti):
+        return False
+
     jti = await token_blocklist.get(jti)
 
     return jti is not None
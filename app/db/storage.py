@@ -0,0 +1,288 @@
+# app/db/storage.py
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+import asyncio
+import base64
+import logging
+import os
+import random
+import shutil
+import time
+
+import httpx
+
+from app.core.cache import LRUCache
+from app.core.config import Config
+from app.errors.exceptions import FileNotFound, SignedURLGenerationFailed, UploadFailed
+
+logger = logging.getLogger(__name__)
+
+# Supabase's resumable (TUS) endpoint requires 6 MiB chunks
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SupabaseStorage:
+    """
+    Async client for the Supabase Storage REST API.
+
+    One pooled httpx.AsyncClient per process; requests are retried with
+    exponential backoff on connection errors and 429/5xx. Files above
+    RESUMABLE_CHUNK_SIZE go through the TUS resumable endpoint, one chunk at
+    a time read from disk.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        bucket: str,
+        max_connections: int = 20,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.base_url = f"{url.rstrip('/')}/storage/v1"
+        self.key = key
+        self.bucket = bucket
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.key}", "apikey": self.key},
+                limits=httpx.Limits(max_connections=self.max_connections),
+                timeout=httpx.Timeout(60, connect=10),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._http().request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                logger.warning(f"Storage {method} {url} returned {response.status_code}, retrying")
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Storage {method} {url} failed ({e!r}), retrying")
+
+            await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+
+    def _object_path(self, path: str) -> str:
+        return quote(f"{self.bucket}/{path}", safe="/")
+
+    async def upload(self, path: str, local_path: str, content_type: str) -> str:
+        size = os.path.getsize(local_path)
+
+        if size > RESUMABLE_CHUNK_SIZE:
+            await self._upload_resumable(path, local_path, content_type, size)
+            return path
+
+        with open(local_path, "rb") as f:
+            content = f.read()
+
+        response = await self._request(
+            "POST",
+            f"/object/{self._object_path(path)}",
+            content=content,
+            headers={"content-type": content_type, "x-upsert": "false"},
+        )
+        if response.status_code >= 400:
+            raise UploadFailed(f"Upload of {path} failed: {response.status_code} {response.text}")
+        return path
+
+    async def _upload_resumable(self, path: str, local_path: str, content_type: str, size: int) -> None:
+        def b64(value: str) -> str:
+            return base64.b64encode(value.encode()).decode()
+
+        tus_headers = {"Tus-Resumable": "1.0.0"}
+        response = await self._request(
+            "POST",
+            "/upload/resumable",
+            headers={
+                **tus_headers,
+                "Upload-Length": str(size),
+                "Upload-Metadata": ",".join([
+                    f"bucketName {b64(self.bucket)}",
+                    f"objectName {b64(path)}",
+                    f"contentType {b64(content_type)}",
+                ]),
+                "x-upsert": "false",
+            },
+        )
+        if response.status_code != 201 or "location" not in response.headers:
+            raise UploadFailed(f"Could not start upload of {path}: {response.status_code} {response.text}")
+        upload_url = response.headers["location"]
+
+        offset = 0
+        with open(local_path, "rb") as f:
+            while offset < size:
+                f.seek(offset)
+                chunk = f.read(RESUMABLE_CHUNK_SIZE)
+                response = await self._request(
+                    "PATCH",
+                    upload_url,
+                    content=chunk,
+                    headers={
+                        **tus_headers,
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream",
+                    },
+                )
+                if response.status_code != 204:
+                    raise UploadFailed(f"Upload of {path} failed at byte {offset}: {response.status_code}")
+                offset = int(response.headers["upload-offset"])
+
+    async def create_signed_url(self, path: str, expires_in: int) -> str:
+        response = await self._request(
+            "POST", f"/object/sign/{self._object_path(path)}", json={"expiresIn": expires_in}
+        )
+        if response.status_code >= 400:
+            raise SignedURLGenerationFailed(f"Signing {path} failed: {response.status_code} {response.text}")
+        return f"{self.base_url}{response.json()['signedURL']}"
+
+    async def create_signed_urls(self, paths: list[str], expires_in: int) -> dict[str, str]:
+        """Sign many paths in one request; paths that fail to sign are left out."""
+        if not paths:
+            return {}
+
+        response = await self._request(
+            "POST",
+            f"/object/sign/{quote(self.bucket)}",
+            json={"expiresIn": expires_in, "paths": paths},
+        )
+        if response.status_code >= 400:
+            raise SignedURLGenerationFailed(f"Batch signing failed: {response.status_code} {response.text}")
+
+        return {
+            item["path"]: f"{self.base_url}{item['signedURL']}"
+            for item in response.json()
+            if item.get("signedURL") and not item.get("error")
+        }
+
+    async def delete(self, paths: list[str]) -> None:
+        if not paths:
+            return
+        response = await self._request("DELETE", f"/object/{quote(self.bucket)}", json={"prefixes": paths})
+        if response.status_code >= 400 and response.status_code != 404:
+            raise FileNotFound(f"Deleting {paths} failed: {response.status_code} {response.text}")
+
+
+class LocalStorage:
+    """Filesystem-backed storage with the same interface, for tests and local runs."""
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def _resolve(self, path: str) -> Path:
+        target = (self.root / path).resolve()
+        if self.root not in target.parents:
+            raise UploadFailed(f"Path escapes storage root: {path}")
+        return target
+
+    async def close(self) -> None:
+        pass
+
+    async def upload(self, path: str, local_path: str, content_type: str) -> str:
+        target = self._resolve(path)
+
+        def copy():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(local_path, target)
+
+        await asyncio.to_thread(copy)
+        return path
+
+    async def create_signed_url(self, path: str, expires_in: int) -> str:
+        target = self._resolve(path)
+        if not target.exists():
+            raise SignedURLGenerationFailed(f"No such file: {path}")
+        return f"{target.as_uri()}?expires={int(time.time()) + expires_in}"
+
+    async def create_signed_urls(self, paths: list[str], expires_in: int) -> dict[str, str]:
+        urls = {}
+        for path in paths:
+            try:
+                urls[path] = await self.create_signed_url(path, expires_in)
+            except SignedURLGenerationFailed:
+                pass
+        return urls
+
+    async def delete(self, paths: list[str]) -> None:
+        for path in paths:
+            self._resolve(path).unlink(missing_ok=True)
+
+
+class SignedURLCache:
+    """
+    Reuses signed URLs per file path until `safety_margin` seconds before they
+    expire. Cache misses of a listing are signed with one batch request.
+    """
+
+    def __init__(self, storage, expires_in: int = 3600, safety_margin: int = 300, maxsize: int = 10000):
+        self.storage = storage
+        self.expires_in = expires_in
+        self.ttl = max(expires_in - safety_margin, 0)
+        self._cache = LRUCache(maxsize=maxsize, ttl=self.ttl)
+
+    async def get(self, path: str) -> str:
+        url = self._cache.get(path)
+        if url is None:
+            url = await self.storage.create_signed_url(path, self.expires_in)
+            self._cache.set(path, url)
+        return url
+
+    async def get_many(self, paths: list[str]) -> dict[str, str]:
+        urls = {}
+        missing = []
+        for path in dict.fromkeys(paths):
+            url = self._cache.get(path)
+            if url is None:
+                missing.append(path)
+            else:
+                urls[path] = url
+
+        if missing:
+            signed = await self.storage.create_signed_urls(missing, self.expires_in)
+            for path, url in signed.items():
+                self._cache.set(path, url)
+            urls.update(signed)
+
+        return urls
+
+    def invalidate(self, path: str) -> None:
+        self._cache.pop(path)
+
+
+def create_storage():
+    if Config.STORAGE_BACKEND == "local":
+        return LocalStorage(Config.STORAGE_LOCAL_ROOT)
+
+    return SupabaseStorage(
+        url=Config.SUPABASE_URL,
+        key=Config.SUPABASE_KEY,
+        bucket=Config.STORAGE_BUCKET,
+        max_connections=Config.STORAGE_MAX_CONNECTIONS,
+        retries=Config.STORAGE_RETRIES,
+    )
+
+
+storage = create_storage()
+
+signed_urls = SignedURLCache(
+    storage,
+    expires_in=Config.SIGNED_URL_EXPIRY,
+    safety_margin=Config.SIGNED_URL_SAFETY_MARGIN,
+    maxsize=Config.SIGNED_URL_CACHE_SIZE,
+)
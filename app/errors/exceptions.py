@@ -55,6 +55,12 @@ class CompanyNotFound(KaleemException):
     pass
 
 
+class CompanyUpdateConflict(KaleemException):
+    """The company was modified after the version the update was based on."""
+
+    pass
+
+
 
 class UserNotFound(KaleemException):
     """User Not found"""
@@ -91,6 +97,10 @@ class SignedURLGenerationFailed(KaleemException):
     """Failed to generate a signed URL for the uploaded file."""
     pass
 
+class InvalidCursor(KaleemException):
+    """The pagination cursor is malformed."""
+    pass
+
 
 
 def create_exception_handler(
@@ -0,0 +1,13 @@
+# app/metrics/routes.py
+from fastapi import APIRouter, Depends
+from app.auth.dependencies import RoleChecker
+from app.core.metrics import collect_metrics
+
+
+metrics_router = APIRouter()
+role_checker = Depends(RoleChecker(['admin']))
+
+
+@metrics_router.get("/", dependencies=[role_checker])
+async def get_metrics():
+    return collect_metrics()
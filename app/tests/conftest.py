@@ -1,4 +1,6 @@
-from app.db.database import get_db
+from app.db.database import get_db, engine
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
 from unittest.mock import Mock
 from fastapi.testclient import TestClient
 from app.auth.dependencies import AccessTokenBearer, RoleChecker, RefreshTokenBearer
@@ -39,4 +41,60 @@ def fake_book_service():
 
 @pytest.fixture 
 def test_client():
-    return TestClient(app)
\ No newline at end of file
+    return TestClient(app)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_session():
+    """
+    Session on a real database inside a transaction that is rolled back
+    afterwards; commits in the code under test become savepoints.
+    Skips the test when the database can't be reached.
+    """
+    try:
+        connection = await engine.connect()
+    except Exception as e:
+        pytest.skip(f"Database not available: {e}")
+
+    transaction = await connection.begin()
+    session = AsyncSession(bind=connection, expire_on_commit=False, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        await session.close()
+        await transaction.rollback()
+        await connection.close()
+
+
+class QueryCounter:
+    """Counts the statements sent to the database, leaving out transaction control."""
+
+    IGNORED = ("SAVEPOINT", "RELEASE", "ROLLBACK", "BEGIN", "COMMIT")
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def reset(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(self.IGNORED):
+            self.statements.append(statement)
+
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
@@ -0,0 +1,105 @@
+import re
+
+from app.data import chunking
+from app.data.chunking import TokenChunker, _Segment, iter_segments
+
+
+class WhitespaceTokenizer:
+    """Stands in for a fast tokenizer: one token per whitespace-separated word."""
+
+    def __call__(self, texts, add_special_tokens=False, return_offsets_mapping=False):
+        if return_offsets_mapping:
+            return {"offset_mapping": [(m.start(), m.end()) for m in re.finditer(r"\S+", texts)]}
+        return {"input_ids": [text.split() for text in texts]}
+
+
+def make_chunker(max_tokens, overlap=0, tokenize_batch=2):
+    return TokenChunker(WhitespaceTokenizer(), max_tokens=max_tokens, overlap=overlap, tokenize_batch=tokenize_batch)
+
+
+def test_chunks_carry_trailing_sentences_as_overlap():
+    chunker = make_chunker(max_tokens=6, overlap=2)
+    pieces = [(None, "One two. Three four. Five six. Seven eight.")]
+
+    chunks = list(chunker.chunks(pieces))
+
+    assert [chunk.text for chunk in chunks] == [
+        "One two. Three four. Five six.",
+        "Five six. Seven eight.",
+    ]
+    assert [chunk.token_count for chunk in chunks] == [6, 4]
+
+
+def test_chunks_without_overlap_do_not_repeat_text():
+    chunker = make_chunker(max_tokens=4)
+    pieces = [(None, "One two. Three four. Five six.")]
+
+    assert [chunk.text for chunk in chunker.chunks(pieces)] == ["One two. Three four.", "Five six."]
+
+
+def test_oversized_sentence_is_cut_into_token_windows():
+    chunker = make_chunker(max_tokens=4, overlap=1)
+    words = [f"w{i}" for i in range(10)]
+    pieces = [(3, "Short one. " + " ".join(words) + ".")]
+
+    chunks = list(chunker.chunks(pieces))
+
+    assert chunks[0].text == "Short one."
+    # Windows of 4 tokens, each starting one token before the previous ended
+    assert [chunk.text for chunk in chunks[1:]] == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9."]
+    assert all(chunk.token_count <= 4 for chunk in chunks)
+    assert all(chunk.page_number == 3 for chunk in chunks)
+
+
+def test_split_long_ends_with_the_last_token():
+    chunker = make_chunker(max_tokens=3, overlap=1)
+
+    windows = list(chunker._split_long(_Segment(1, "a b c d e", 5)))
+
+    assert [window.text for window in windows] == ["a b c", "c d e"]
+
+
+def test_segments_are_tagged_with_the_page_they_start_on():
+    pieces = [
+        (1, "First sentence. Second "),
+        (2, "half continues. Third one.\n\n"),
+        (3, "Fourth on page three."),
+    ]
+
+    assert list(iter_segments(pieces)) == [
+        (1, "First sentence."),
+        (1, "Second half continues."),
+        (2, "Third one."),
+        (3, "Fourth on page three."),
+    ]
+
+
+def test_chunk_page_is_the_page_of_its_first_sentence():
+    chunker = make_chunker(max_tokens=5)
+    pieces = [(1, "Alpha beta. Gamma "), (2, "delta. Epsilon zeta.")]
+
+    chunks = list(chunker.chunks(pieces))
+
+    assert [(chunk.page_number, chunk.text) for chunk in chunks] == [
+        (1, "Alpha beta. Gamma delta."),
+        (2, "Epsilon zeta."),
+    ]
+
+
+def test_text_without_boundaries_is_flushed_at_max_pending_chars(monkeypatch):
+    monkeypatch.setattr(chunking, "MAX_PENDING_CHARS", 50)
+    consumed = []
+
+    def pieces():
+        for page in range(1, 10):
+            consumed.append(page)
+            yield page, "word " * 4
+
+    segments = iter_segments(pieces())
+    page, text = next(segments)
+
+    # 20 characters a piece: the third piece pushes it past the limit
+    assert consumed == [1, 2, 3]
+    assert page == 1
+    assert text == " ".join(["word"] * 12)
+    assert [page for page, _ in segments] == [4, 7]
@@ -0,0 +1,156 @@
+import time
+import uuid
+import pytest
+
+from app.companies.metering import NOT_LOADED, OVER_LIMIT, TicketMeter
+from app.db.redis import redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class FakeSession:
+    """Just enough of AsyncSession for TicketMeter._load and flush."""
+
+    def __init__(self, row=None, fail=False):
+        self.row = row
+        self.fail = fail
+        self.executed = []
+        self.committed = False
+        self.rolled_back = False
+
+    async def exec(self, statement):
+        return FakeResult(self.row)
+
+    async def execute(self, statement, params=None):
+        if self.fail:
+            raise RuntimeError("database is down")
+        self.executed.append(params)
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.fixture
+async def meter():
+    try:
+        await redis_client.ping()
+    except Exception:
+        pytest.skip("Redis is not available")
+
+    # Own key prefix, so the test never touches real counters
+    prefix = f"test-tickets-{uuid.uuid4().hex[:8]}"
+    yield TicketMeter(prefix=prefix, orphan_after=60)
+
+    keys = [key async for key in redis_client.scan_iter(f"{prefix}:*")]
+    if keys:
+        await redis_client.delete(*keys)
+
+
+async def test_consume_script_checks_limit_atomically(meter):
+    company_uid = str(uuid.uuid4())
+    keys = [meter.usage_key.format(company_uid), meter.limit_key.format(company_uid), meter.pending_key]
+
+    assert await meter._consume(keys=keys, args=[company_uid, 1]) == NOT_LOADED
+
+    await redis_client.set(keys[0], 8)
+    await redis_client.set(keys[1], 10)
+
+    assert await meter._consume(keys=keys, args=[company_uid, 2]) == 10
+    assert await meter._consume(keys=keys, args=[company_uid, 1]) == OVER_LIMIT
+    assert int(await redis_client.get(keys[0])) == 10
+    assert int(await redis_client.hget(meter.pending_key, company_uid)) == 2
+
+
+async def test_load_counts_pending_and_in_flight_tickets(meter):
+    company_uid = str(uuid.uuid4())
+    flushing_key = f"{meter.pending_key}:flushing:{int(time.time())}:{uuid.uuid4()}"
+    await redis_client.hset(meter.pending_key, company_uid, 2)
+    await redis_client.hset(flushing_key, company_uid, 3)
+    await redis_client.sadd(meter.flushing_set_key, flushing_key)
+
+    # 5 in Postgres + 2 pending + 3 being flushed: the limit of 10 is reached
+    assert await meter.consume(company_uid, FakeSession(row=(5, 10))) is None
+    assert int(await redis_client.get(meter.usage_key.format(company_uid))) == 10
+
+
+async def test_load_retries_when_a_flush_commits_during_it(meter):
+    company_uid = str(uuid.uuid4())
+    await redis_client.hset(meter.pending_key, company_uid, 3)
+    # Postgres before and after the flush of those 3 tickets
+    rows = [(5, 10), (8, 10)]
+
+    class FlushDuringReadSession(FakeSession):
+        async def exec(self, statement):
+            row = rows.pop(0)
+            if rows:
+                # The first read saw usage 5; the flush commits right after it
+                await meter.flush(FakeSession())
+            return FakeResult(row)
+
+    await meter._load(company_uid, FlushDuringReadSession())
+
+    assert rows == []
+    assert int(await redis_client.get(meter.usage_key.format(company_uid))) == 8
+
+
+async def test_loaded_counters_expire(meter):
+    company_uid = str(uuid.uuid4())
+
+    assert await meter.consume(company_uid, FakeSession(row=(5, 10))) == 6
+
+    for key in (meter.usage_key, meter.limit_key):
+        assert 0 < await redis_client.ttl(key.format(company_uid)) <= meter.counter_ttl
+
+
+async def test_flush_writes_pending_tickets(meter):
+    company_uid = str(uuid.uuid4())
+    await redis_client.hset(meter.pending_key, company_uid, 4)
+    session = FakeSession()
+
+    assert await meter.flush(session) == 4
+
+    assert session.committed
+    assert session.executed == [{"uids": [uuid.UUID(company_uid)], "tickets": [4]}]
+    assert not await redis_client.exists(meter.pending_key)
+    assert await redis_client.smembers(meter.flushing_set_key) == set()
+    assert await meter.flush(FakeSession()) == 0
+
+
+async def test_failed_flush_hands_tickets_back(meter):
+    company_uid = str(uuid.uuid4())
+    await redis_client.hset(meter.pending_key, company_uid, 4)
+    session = FakeSession(fail=True)
+
+    with pytest.raises(RuntimeError):
+        await meter.flush(session)
+
+    assert session.rolled_back
+    assert int(await redis_client.hget(meter.pending_key, company_uid)) == 4
+    assert await redis_client.smembers(meter.flushing_set_key) == set()
+
+
+async def test_recover_orphans_hands_back_only_old_flushes(meter):
+    company_uid = str(uuid.uuid4())
+    orphan_key = f"{meter.pending_key}:flushing:{int(time.time()) - 3600}:{uuid.uuid4()}"
+    running_key = f"{meter.pending_key}:flushing:{int(time.time())}:{uuid.uuid4()}"
+    for key, count in ((orphan_key, 3), (running_key, 5)):
+        await redis_client.hset(key, company_uid, count)
+        await redis_client.sadd(meter.flushing_set_key, key)
+    await redis_client.hset(meter.pending_key, company_uid, 1)
+
+    assert await meter.recover_orphans() == 1
+
+    assert int(await redis_client.hget(meter.pending_key, company_uid)) == 4
+    assert not await redis_client.exists(orphan_key)
+    assert await redis_client.smembers(meter.flushing_set_key) == {running_key.encode()}
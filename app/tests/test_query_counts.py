@@ -0,0 +1,172 @@
+from sqlalchemy.exc import InvalidRequestError
+from datetime import timezone
+import pytest
+import uuid
+
+from app.auth.models import User
+from app.auth.service import UserService
+from app.companies.models import Company
+from app.companies.schemas import CompanyUpdateModel
+from app.companies.service import CompanyService
+from app.data.models import TrainingDataSource
+from app.data.service import TrainingDataService
+from app.errors.exceptions import CompanyUpdateConflict
+
+pytestmark = pytest.mark.anyio
+
+user_service = UserService()
+company_service = CompanyService()
+data_service = TrainingDataService()
+
+
+async def create_user_with_company(session, files=3):
+    suffix = uuid.uuid4().hex[:8]
+    user = User(
+        username=f"u{suffix}",
+        email=f"{suffix}@example.com",
+        first_name="Test",
+        last_name="User",
+        role="user",
+        password_hash="x",
+    )
+    session.add(user)
+    await session.flush()
+
+    company = Company(
+        name=f"Company {suffix}",
+        email=f"company-{suffix}@example.com",
+        industry="software",
+        plan="basic",
+        monthly_ticket_limit=5000,
+        ticket_usage=0,
+        user_uid=user.uid,
+    )
+    session.add(company)
+    await session.flush()
+
+    for i in range(files):
+        session.add(TrainingDataSource(
+            company_uid=company.uid, user_uid=user.uid, type="text/plain", name=f"file-{i}.txt"
+        ))
+    await session.flush()
+
+    # Start the measured calls from an empty identity map
+    session.expunge_all()
+    return user.uid, user.email, company.uid
+
+
+async def test_get_user_by_email_loads_no_relations(db_session, query_counter):
+    _, email, _ = await create_user_with_company(db_session)
+    query_counter.reset()
+
+    user = await user_service.get_user_by_email(email, db_session)
+
+    assert user is not None
+    assert query_counter.count == 1
+    with pytest.raises(InvalidRequestError):
+        user.company
+
+
+async def test_get_user_with_relations(db_session, query_counter):
+    user_uid, _, _ = await create_user_with_company(db_session)
+    query_counter.reset()
+
+    user = await user_service.get_user_with_relations(user_uid, db_session)
+
+    assert query_counter.count == 3
+    assert len(user.company) == 1
+    assert len(user.data) == 3
+
+
+async def test_get_company_without_data(db_session, query_counter):
+    _, _, company_uid = await create_user_with_company(db_session)
+    query_counter.reset()
+
+    company = await company_service.get_company(company_uid, db_session)
+
+    assert query_counter.count == 1
+    with pytest.raises(InvalidRequestError):
+        company.data
+
+
+async def test_get_company_with_data(db_session, query_counter):
+    _, _, company_uid = await create_user_with_company(db_session)
+    query_counter.reset()
+
+    company = await company_service.get_company(company_uid, db_session, with_data=True)
+
+    assert query_counter.count == 2
+    assert len(company.data) == 3
+
+
+async def test_company_listings_are_one_query(db_session, query_counter):
+    user_uid, _, _ = await create_user_with_company(db_session)
+    await create_user_with_company(db_session)
+    query_counter.reset()
+
+    companies, _ = await company_service.get_all_companies(db_session, limit=10)
+    assert query_counter.count == 1
+    assert len(companies) >= 2
+
+    query_counter.reset()
+    companies, next_cursor = await company_service.get_user_company(user_uid, db_session)
+    assert query_counter.count == 1
+    assert len(companies) == 1
+    assert next_cursor is None
+
+
+async def test_file_listing_pages_in_one_query(db_session, query_counter):
+    _, _, company_uid = await create_user_with_company(db_session, files=3)
+    query_counter.reset()
+
+    files, next_cursor = await data_service.get_data_sources_for_company(company_uid, db_session, limit=2)
+    assert query_counter.count == 1
+    assert len(files) == 2
+    assert next_cursor is not None
+
+    files, next_cursor = await data_service.get_data_sources_for_company(
+        company_uid, db_session, cursor=next_cursor, limit=2
+    )
+    assert len(files) == 1
+    assert next_cursor is None
+
+    files, _ = await data_service.get_data_sources_for_company(company_uid, db_session, status="failed")
+    assert files == []
+
+
+async def test_update_company_is_one_statement(db_session, query_counter):
+    _, _, company_uid = await create_user_with_company(db_session, files=0)
+    query_counter.reset()
+
+    company = await company_service.update_company(
+        company_uid, CompanyUpdateModel(name="Renamed"), db_session
+    )
+
+    assert query_counter.count == 1
+    assert company.name == "Renamed"
+    assert company.plan == "basic"
+
+
+async def test_update_company_rejects_stale_updated_at(db_session):
+    _, _, company_uid = await create_user_with_company(db_session, files=0)
+    company = await company_service.get_company(company_uid, db_session)
+    seen_updated_at = company.updated_at
+
+    await company_service.update_company(company_uid, CompanyUpdateModel(plan="pro"), db_session)
+
+    with pytest.raises(CompanyUpdateConflict):
+        await company_service.update_company(
+            company_uid, CompanyUpdateModel(plan="enterprise", updated_at=seen_updated_at), db_session
+        )
+
+
+async def test_update_company_accepts_aware_updated_at(db_session):
+    _, _, company_uid = await create_user_with_company(db_session, files=0)
+    company = await company_service.get_company(company_uid, db_session)
+    seen_updated_at = company.updated_at.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    company = await company_service.update_company(
+        company_uid, CompanyUpdateModel(plan="pro", updated_at=seen_updated_at), db_session
+    )
+
+    assert company.plan == "pro"
@@ -0,0 +1,93 @@
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+import pytest
+
+from app.db.storage import LocalStorage, SignedURLCache
+from app.errors.exceptions import SignedURLGenerationFailed, UploadFailed
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingStorage:
+    """Wraps a LocalStorage and records the signing calls SignedURLCache makes."""
+
+    def __init__(self, root):
+        self.storage = LocalStorage(root)
+        self.single_calls = []
+        self.batch_calls = []
+
+    async def upload(self, path, local_path, content_type):
+        return await self.storage.upload(path, local_path, content_type)
+
+    async def create_signed_url(self, path, expires_in):
+        self.single_calls.append(path)
+        return await self.storage.create_signed_url(path, expires_in)
+
+    async def create_signed_urls(self, paths, expires_in):
+        self.batch_calls.append(list(paths))
+        return await self.storage.create_signed_urls(paths, expires_in)
+
+
+def write_file(tmp_path, name, content=b"hello"):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+async def test_local_storage_upload_and_sign_round_trip(tmp_path):
+    storage = LocalStorage(tmp_path / "bucket")
+    local_path = write_file(tmp_path, "upload.txt", b"some bytes")
+
+    await storage.upload("company/a.txt", local_path, "text/plain")
+    url = await storage.create_signed_url("company/a.txt", expires_in=60)
+
+    parsed = urlparse(url)
+    assert parsed.scheme == "file"
+    assert parsed.query.startswith("expires=")
+    with open(url2pathname(parsed.path), "rb") as f:
+        assert f.read() == b"some bytes"
+
+    await storage.delete(["company/a.txt"])
+    with pytest.raises(SignedURLGenerationFailed):
+        await storage.create_signed_url("company/a.txt", expires_in=60)
+
+
+async def test_local_storage_rejects_paths_outside_root(tmp_path):
+    storage = LocalStorage(tmp_path / "bucket")
+    local_path = write_file(tmp_path, "upload.txt")
+
+    with pytest.raises(UploadFailed):
+        await storage.upload("../outside.txt", local_path, "text/plain")
+
+
+async def test_get_many_signs_misses_in_one_batch(tmp_path):
+    storage = CountingStorage(tmp_path / "bucket")
+    local_path = write_file(tmp_path, "upload.txt")
+    for name in ("a.txt", "b.txt", "c.txt"):
+        await storage.upload(name, local_path, "text/plain")
+    cache = SignedURLCache(storage, expires_in=3600, safety_margin=300)
+
+    first = await cache.get("a.txt")
+    urls = await cache.get_many(["a.txt", "b.txt", "c.txt", "b.txt", "missing.txt"])
+
+    # a.txt came from the cache; b and c were signed together, once each
+    assert storage.single_calls == ["a.txt"]
+    assert storage.batch_calls == [["b.txt", "c.txt", "missing.txt"]]
+    assert urls["a.txt"] == first
+    assert set(urls) == {"a.txt", "b.txt", "c.txt"}
+
+    again = await cache.get_many(["a.txt", "b.txt", "c.txt"])
+    assert again == urls
+    assert len(storage.batch_calls) == 1
+
+
+async def test_get_many_resigns_after_invalidate(tmp_path):
+    storage = CountingStorage(tmp_path / "bucket")
+    await storage.upload("a.txt", write_file(tmp_path, "upload.txt"), "text/plain")
+    cache = SignedURLCache(storage, expires_in=3600, safety_margin=300)
+
+    await cache.get_many(["a.txt"])
+    cache.invalidate("a.txt")
+    await cache.get_many(["a.txt"])
+
+    assert storage.batch_calls == [["a.txt"], ["a.txt"]]
@@ -0,0 +1,29 @@
+"""Add page number to training data chunks
+
+Revision ID: 4b7e91d3c2a6
+Revises: 8c1f4e2a9b37
+Create Date: 2026-10-18 12:03:17.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e91d3c2a6'
+down_revision: Union[str, Sequence[str], None] = '8c1f4e2a9b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('training_data_chunks', sa.Column('page_number', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('training_data_chunks', 'page_number')
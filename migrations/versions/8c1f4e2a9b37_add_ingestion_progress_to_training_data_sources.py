@@ -0,0 +1,31 @@
+"""Add ingestion progress to training data sources
+
+Revision ID: 8c1f4e2a9b37
+Revises: 13cc0e2e82de
+Create Date: 2026-10-18 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f4e2a9b37'
+down_revision: Union[str, Sequence[str], None] = '13cc0e2e82de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('training_data_sources', sa.Column('progress', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('training_data_sources', sa.Column('error', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('training_data_sources', 'error')
+    op.drop_column('training_data_sources', 'progress')
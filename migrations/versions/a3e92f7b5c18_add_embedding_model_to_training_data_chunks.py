@@ -0,0 +1,31 @@
+"""Add embedding model to training data chunks
+
+Revision ID: a3e92f7b5c18
+Revises: d5a0c8e6f713
+Create Date: 2026-10-18 14:26:51.904337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3e92f7b5c18'
+down_revision: Union[str, Sequence[str], None] = 'd5a0c8e6f713'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('training_data_chunks', sa.Column('embedding_model', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.create_index('ix_training_data_chunks_embedding_model_content_hash', 'training_data_chunks', ['embedding_model', 'content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_training_data_chunks_embedding_model_content_hash', table_name='training_data_chunks')
+    op.drop_column('training_data_chunks', 'embedding_model')
@@ -0,0 +1,31 @@
+"""Add keyset pagination indexes to companies
+
+Revision ID: b82d4c6e1f95
+Revises: f61b2d94e8a0
+Create Date: 2026-10-18 16:12:40.385219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b82d4c6e1f95'
+down_revision: Union[str, Sequence[str], None] = 'f61b2d94e8a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_companies_created_at_uid', 'companies', ['created_at', 'uid'], unique=False)
+    op.create_index('ix_companies_user_uid_created_at_uid', 'companies', ['user_uid', 'created_at', 'uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_companies_user_uid_created_at_uid', table_name='companies')
+    op.drop_index('ix_companies_created_at_uid', table_name='companies')
@@ -0,0 +1,34 @@
+"""Add company/created_at index to training data sources
+
+Revision ID: c4f7a1e9d260
+Revises: b82d4c6e1f95
+Create Date: 2026-10-18 17:02:19.648731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f7a1e9d260'
+down_revision: Union[str, Sequence[str], None] = 'b82d4c6e1f95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_training_data_sources_company_uid_created_at',
+        'training_data_sources',
+        ['company_uid', sa.text('created_at DESC'), sa.text('uid DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_training_data_sources_company_uid_created_at', table_name='training_data_sources')
@@ -0,0 +1,35 @@
+"""Add content hashes to training data
+
+Revision ID: d5a0c8e6f713
+Revises: 4b7e91d3c2a6
+Create Date: 2026-10-18 13:41:05.227164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a0c8e6f713'
+down_revision: Union[str, Sequence[str], None] = '4b7e91d3c2a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('training_data_sources', sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.create_index(op.f('ix_training_data_sources_content_hash'), 'training_data_sources', ['content_hash'], unique=False)
+    op.add_column('training_data_chunks', sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.create_index(op.f('ix_training_data_chunks_content_hash'), 'training_data_chunks', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_training_data_chunks_content_hash'), table_name='training_data_chunks')
+    op.drop_column('training_data_chunks', 'content_hash')
+    op.drop_index(op.f('ix_training_data_sources_content_hash'), table_name='training_data_sources')
+    op.drop_column('training_data_sources', 'content_hash')
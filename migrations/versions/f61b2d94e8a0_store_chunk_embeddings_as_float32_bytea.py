@@ -0,0 +1,34 @@
+"""Store chunk embeddings as float32 bytea
+
+Revision ID: f61b2d94e8a0
+Revises: a3e92f7b5c18
+Create Date: 2026-10-18 15:08:32.671540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f61b2d94e8a0'
+down_revision: Union[str, Sequence[str], None] = 'a3e92f7b5c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored arrays are dropped rather than converted; they are only a cache
+    # and get refilled by ingestion or POST /reindex/{company_uid}
+    op.drop_column('training_data_chunks', 'embedding')
+    op.add_column('training_data_chunks', sa.Column('embedding', postgresql.BYTEA(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('training_data_chunks', 'embedding')
+    op.add_column('training_data_chunks', sa.Column('embedding', postgresql.ARRAY(sa.FLOAT()), nullable=True))
@@ -0,0 +1,13 @@
+# pdf_worker.py
+# Runs in the PDF extraction worker processes. Kept outside the app package
+# so a spawned worker only imports PyMuPDF, not FastAPI, the database or
+# the embedding model.
+from typing import List
+
+import fitz  # PyMuPDF
+
+
+def extract_pdf_range(path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop); runs in a worker process."""
+    with fitz.open(path) as doc:
+        return [doc[number].get_text() for number in range(start, stop)]